@@ -0,0 +1,96 @@
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class FeatureCache:
+    """Memo of indicator values computed during one analysis run.
+
+    Entries are keyed on the identity of the price frame they were computed
+    from, the indicator name and its parameters. The frame itself is kept in
+    the entry so its id cannot be reused by another frame while the cache is
+    alive. Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, frame, name: str, params: tuple, compute):
+        """Return the cached value of an indicator, computing it on a miss."""
+        key = (id(frame), name, params)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._values.setdefault(key, (frame, value))
+        return value
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_current_cache: ContextVar[Optional[FeatureCache]] = ContextVar(
+    "feature_cache", default=None
+)
+
+
+@contextmanager
+def feature_cache_scope():
+    """
+    Activate a feature cache for the duration of a run.
+
+    Nested scopes reuse the active cache, so a caller can share one cache
+    across several agents by opening the scope around them.
+
+    Yields:
+        FeatureCache: The active cache
+    """
+    cache = _current_cache.get()
+    if cache is not None:
+        yield cache
+        return
+    cache = FeatureCache()
+    token = _current_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_cache.reset(token)
+
+
+def cached_feature(name: str):
+    """
+    Decorate an indicator function taking a price frame as first argument.
+
+    Inside a feature_cache_scope the result is computed once per frame and
+    parameters (defaults included); outside of one the function runs as is.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(frame, *args, **kwargs):
+            cache = _current_cache.get()
+            if cache is None:
+                return func(frame, *args, **kwargs)
+            bound = signature.bind(frame, *args, **kwargs)
+            bound.apply_defaults()
+            params = tuple(bound.arguments.values())[1:]
+            return cache.get(
+                frame, name, params, lambda: func(frame, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
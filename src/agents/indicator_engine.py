@@ -0,0 +1,400 @@
+import math
+from collections import deque
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+##### Incremental Indicator Engine #####
+# Streaming counterparts of the indicators in agents/technicals.py. Each
+# indicator keeps only its running EMA/Wilder/rolling-window state so a new
+# candle is folded in with O(1) work instead of recomputing the whole frame.
+# Values match the batch functions in technicals.py computed over the same
+# history.
+
+
+class _Ema:
+    """Exponential moving average, same as Series.ewm(span, adjust=False)."""
+
+    def __init__(self, span: int):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def state(self) -> dict:
+        return {"value": self.value}
+
+    def load(self, state: dict) -> None:
+        self.value = state["value"]
+
+
+class _AdjustedEwm:
+    """Exponential moving average, same as Series.ewm(span).mean() (adjust=True).
+
+    NaN inputs are skipped but still decay the weights of older observations,
+    like pandas with ignore_na=False.
+    """
+
+    def __init__(self, span: int):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def update(self, x: float) -> float:
+        self.numerator *= self.decay
+        self.denominator *= self.decay
+        if not math.isnan(x):
+            self.numerator += x
+            self.denominator += 1.0
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.denominator == 0:
+            return math.nan
+        return self.numerator / self.denominator
+
+    def state(self) -> dict:
+        return {"numerator": self.numerator, "denominator": self.denominator}
+
+    def load(self, state: dict) -> None:
+        self.numerator = state["numerator"]
+        self.denominator = state["denominator"]
+
+
+class _RollingWindow:
+    """Fixed-size window with running power sums for rolling moments.
+
+    Sums are rebuilt from the window every `window` updates so floating point
+    drift cannot accumulate; the amortized cost per update stays O(1).
+    """
+
+    def __init__(self, window: int, max_power: int = 2):
+        self.window = window
+        self.max_power = max_power
+        self.values = deque(maxlen=window)
+        self.sums = [0.0] * (max_power + 1)
+        self.nan_count = 0
+        self.updates = 0
+
+    def update(self, x: float) -> None:
+        if len(self.values) == self.window:
+            self._add(self.values[0], -1)
+        self.values.append(x)
+        self._add(x, 1)
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._resync()
+
+    def _add(self, x: float, sign: int) -> None:
+        if math.isnan(x):
+            self.nan_count += sign
+            return
+        for power in range(1, self.max_power + 1):
+            self.sums[power] += sign * x**power
+
+    def _resync(self) -> None:
+        self.sums = [0.0] * (self.max_power + 1)
+        self.nan_count = 0
+        for x in self.values:
+            self._add(x, 1)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window and self.nan_count == 0
+
+    def mean(self) -> float:
+        if not self.ready:
+            return math.nan
+        return self.sums[1] / self.window
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), like Series.rolling().std()."""
+        if not self.ready:
+            return math.nan
+        n = self.window
+        variance = (self.sums[2] - self.sums[1] ** 2 / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def _central_moments(self) -> tuple[float, float, float, float]:
+        n = self.window
+        a = self.sums[1] / n
+        b = self.sums[2] / n - a * a
+        c = self.sums[3] / n - a**3 - 3 * a * b
+        d = (
+            self.sums[4] / n - a**4 - 6 * b * a * a - 4 * c * a
+            if self.max_power >= 4
+            else math.nan
+        )
+        return a, b, c, d
+
+    def skew(self) -> float:
+        """Bias-corrected skewness, like Series.rolling().skew()."""
+        n = self.window
+        if not self.ready or n < 3:
+            return math.nan
+        _, b, c, _ = self._central_moments()
+        if b <= 1e-14:
+            return math.nan
+        return math.sqrt(n * (n - 1)) * c / ((n - 2) * b**1.5)
+
+    def kurt(self) -> float:
+        """Bias-corrected excess kurtosis, like Series.rolling().kurt()."""
+        n = self.window
+        if not self.ready or n < 4:
+            return math.nan
+        _, b, _, d = self._central_moments()
+        if b <= 1e-14:
+            return math.nan
+        k = (n * n - 1) * d / (b * b) - 3 * (n - 1) ** 2
+        return k / ((n - 2) * (n - 3))
+
+    def state(self) -> dict:
+        return {"values": list(self.values), "updates": self.updates}
+
+    def load(self, state: dict) -> None:
+        self.values = deque(state["values"], maxlen=self.window)
+        self.updates = state["updates"]
+        self._resync()
+
+
+class SymbolIndicators:
+    """Running indicator state for a single symbol.
+
+    Covers the indicators used by technical_analyst_agent: MACD, RSI,
+    Bollinger Bands, EMAs, ADX, ATR, OBV and the rolling skewness/kurtosis
+    of returns used by calculate_stat_arb_signals.
+    """
+
+    def __init__(
+        self,
+        ema_spans: tuple = (8, 21, 55),
+        rsi_periods: tuple = (14, 28),
+        bollinger_window: int = 20,
+        adx_period: int = 14,
+        atr_period: int = 14,
+        moments_window: int = 63,
+        obv_slope_window: int = 5,
+    ):
+        self.ema = {span: _Ema(span) for span in ema_spans}
+        self.macd_fast = _Ema(12)
+        self.macd_slow = _Ema(26)
+        self.macd_signal = _Ema(9)
+        self.rsi_gain = {period: _RollingWindow(period, 1) for period in rsi_periods}
+        self.rsi_loss = {period: _RollingWindow(period, 1) for period in rsi_periods}
+        self.bollinger = _RollingWindow(bollinger_window, 2)
+        self.plus_dm = _AdjustedEwm(adx_period)
+        self.minus_dm = _AdjustedEwm(adx_period)
+        self.adx_tr = _AdjustedEwm(adx_period)
+        self.adx = _AdjustedEwm(adx_period)
+        self.atr = _RollingWindow(atr_period, 1)
+        self.returns = _RollingWindow(moments_window, 4)
+        self.obv = 0.0
+        self.obv_history = deque(maxlen=obv_slope_window + 1)
+        self.previous = None
+        self.values = {}
+
+    def update(self, candle: Dict[str, float]) -> Dict[str, float]:
+        """Fold one candle (open/close/high/low/volume) into the state.
+
+        Returns:
+            dict: Latest indicator values after this candle
+        """
+        close = float(candle["close"])
+        high = float(candle["high"])
+        low = float(candle["low"])
+        volume = float(candle["volume"])
+        previous = self.previous
+        values = {}
+
+        # EMAs and MACD
+        for span, ema in self.ema.items():
+            values[f"ema_{span}"] = ema.update(close)
+        macd = self.macd_fast.update(close) - self.macd_slow.update(close)
+        values["prev_macd"] = self.values.get("macd", math.nan)
+        values["prev_macd_signal"] = self.values.get("macd_signal", math.nan)
+        values["macd"] = macd
+        values["macd_signal"] = self.macd_signal.update(macd)
+
+        # RSI (simple moving average of gains and losses)
+        delta = close - previous["close"] if previous else 0.0
+        for period in self.rsi_gain:
+            self.rsi_gain[period].update(max(delta, 0.0))
+            self.rsi_loss[period].update(max(-delta, 0.0))
+            values[f"rsi_{period}"] = _rsi(
+                self.rsi_gain[period].mean(), self.rsi_loss[period].mean()
+            )
+
+        # Bollinger Bands
+        self.bollinger.update(close)
+        sma, std = self.bollinger.mean(), self.bollinger.std()
+        values["bb_upper"] = sma + 2 * std
+        values["bb_lower"] = sma - 2 * std
+
+        # True range, ADX and ATR
+        if previous:
+            true_range = max(
+                high - low,
+                abs(high - previous["close"]),
+                abs(low - previous["close"]),
+            )
+            up_move = high - previous["high"]
+            down_move = previous["low"] - low
+        else:
+            true_range = high - low
+            up_move = down_move = math.nan
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        smoothed_tr = self.adx_tr.update(true_range)
+        plus_di = 100 * _divide(self.plus_dm.update(plus_dm), smoothed_tr)
+        minus_di = 100 * _divide(self.minus_dm.update(minus_dm), smoothed_tr)
+        dx = 100 * _divide(abs(plus_di - minus_di), plus_di + minus_di)
+        values["adx"] = self.adx.update(dx)
+        values["+di"] = plus_di
+        values["-di"] = minus_di
+        self.atr.update(true_range)
+        values["atr"] = self.atr.mean()
+
+        # OBV
+        if previous and close > previous["close"]:
+            self.obv += volume
+        elif previous and close < previous["close"]:
+            self.obv -= volume
+        self.obv_history.append(self.obv)
+        values["obv"] = self.obv
+        values["obv_slope"] = (
+            (self.obv_history[-1] - self.obv_history[0]) / (len(self.obv_history) - 1)
+            if len(self.obv_history) == self.obv_history.maxlen
+            else math.nan
+        )
+
+        # Rolling moments of returns
+        self.returns.update(
+            _divide(close, previous["close"]) - 1 if previous else math.nan
+        )
+        values["skew"] = self.returns.skew()
+        values["kurt"] = self.returns.kurt()
+
+        values["close"] = close
+        self.previous = {"close": close, "high": high, "low": low}
+        self.values = values
+        return values
+
+    def snapshot(self) -> dict:
+        """Return the full state as a JSON-serializable dict."""
+        return {
+            "ema": {str(span): ema.state() for span, ema in self.ema.items()},
+            "macd_fast": self.macd_fast.state(),
+            "macd_slow": self.macd_slow.state(),
+            "macd_signal": self.macd_signal.state(),
+            "rsi_gain": {str(p): w.state() for p, w in self.rsi_gain.items()},
+            "rsi_loss": {str(p): w.state() for p, w in self.rsi_loss.items()},
+            "bollinger": self.bollinger.state(),
+            "plus_dm": self.plus_dm.state(),
+            "minus_dm": self.minus_dm.state(),
+            "adx_tr": self.adx_tr.state(),
+            "adx": self.adx.state(),
+            "atr": self.atr.state(),
+            "returns": self.returns.state(),
+            "obv": self.obv,
+            "obv_history": list(self.obv_history),
+            "previous": self.previous,
+            "values": self.values,
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """Restore the state produced by snapshot()."""
+        for span, ema in self.ema.items():
+            ema.load(snapshot["ema"][str(span)])
+        self.macd_fast.load(snapshot["macd_fast"])
+        self.macd_slow.load(snapshot["macd_slow"])
+        self.macd_signal.load(snapshot["macd_signal"])
+        for period in self.rsi_gain:
+            self.rsi_gain[period].load(snapshot["rsi_gain"][str(period)])
+            self.rsi_loss[period].load(snapshot["rsi_loss"][str(period)])
+        self.bollinger.load(snapshot["bollinger"])
+        self.plus_dm.load(snapshot["plus_dm"])
+        self.minus_dm.load(snapshot["minus_dm"])
+        self.adx_tr.load(snapshot["adx_tr"])
+        self.adx.load(snapshot["adx"])
+        self.atr.load(snapshot["atr"])
+        self.returns.load(snapshot["returns"])
+        self.obv = snapshot["obv"]
+        self.obv_history = deque(
+            snapshot["obv_history"], maxlen=self.obv_history.maxlen
+        )
+        self.previous = snapshot["previous"]
+        self.values = snapshot["values"]
+
+
+class IndicatorEngine:
+    """Holds incremental indicator state for many symbols.
+
+    Example:
+        engine = IndicatorEngine()
+        engine.warm_up("BTC", prices_df)
+        latest = engine.update("BTC", new_candle)
+        saved = engine.snapshot()
+        ...
+        engine.restore(saved)
+    """
+
+    def __init__(self, **indicator_params):
+        self.indicator_params = indicator_params
+        self.symbols: Dict[str, SymbolIndicators] = {}
+
+    def _get(self, symbol: str) -> SymbolIndicators:
+        if symbol not in self.symbols:
+            self.symbols[symbol] = SymbolIndicators(**self.indicator_params)
+        return self.symbols[symbol]
+
+    def update(self, symbol: str, candle: Dict[str, float]) -> Dict[str, float]:
+        """Advance a symbol by one candle and return its latest indicator values."""
+        return self._get(symbol).update(candle)
+
+    def warm_up(self, symbol: str, prices_df: pd.DataFrame) -> Dict[str, float]:
+        """Feed a history of candles (DataFrame or PriceFrame) for a symbol, oldest first."""
+        columns = ["open", "close", "high", "low", "volume"]
+        values = {}
+        for row in zip(*[prices_df[column].to_numpy() for column in columns]):
+            values = self.update(symbol, dict(zip(columns, row)))
+        return values
+
+    def latest(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Return the latest indicator values for a symbol, if any."""
+        if symbol not in self.symbols:
+            return None
+        return self.symbols[symbol].values
+
+    def snapshot(self) -> dict:
+        """Return the state of every symbol as a JSON-serializable dict."""
+        return {
+            symbol: indicators.snapshot()
+            for symbol, indicators in self.symbols.items()
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """Replace the engine state with one produced by snapshot()."""
+        self.symbols = {}
+        for symbol, state in snapshot.items():
+            self._get(symbol).restore(state)
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    if denominator == 0 or math.isnan(denominator):
+        return math.nan
+    return numerator / denominator
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> float:
+    if math.isnan(avg_gain) or math.isnan(avg_loss):
+        return math.nan
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else math.nan
+    return 100 - (100 / (1 + avg_gain / avg_loss))
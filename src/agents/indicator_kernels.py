@@ -0,0 +1,135 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # the NumPy kernels below are used instead
+    njit = None
+
+
+def _central_moments_numpy(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean, biased central moments m2, m3, m4 and constant flag of every full window."""
+    n = len(values)
+    moments = np.full((5, n), np.nan)
+    if n < window:
+        return moments
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    mean = windows.mean(axis=1)
+    deviations = windows - mean[:, None]
+    squared = deviations * deviations
+    moments[0, window - 1 :] = mean
+    moments[1, window - 1 :] = squared.mean(axis=1)
+    moments[2, window - 1 :] = (squared * deviations).mean(axis=1)
+    moments[3, window - 1 :] = (squared * squared).mean(axis=1)
+    moments[4, window - 1 :] = windows.max(axis=1) == windows.min(axis=1)
+    return moments
+
+
+def _central_moments_loop(values, window):
+    """Loop version of _central_moments_numpy, compiled with Numba."""
+    n = len(values)
+    moments = np.full((5, n), np.nan)
+    for end in range(window - 1, n):
+        start = end - window + 1
+        total = 0.0
+        constant = 1.0
+        for i in range(start, end + 1):
+            total += values[i]
+            if values[i] != values[start]:
+                constant = 0.0
+        mean = total / window
+        m2 = 0.0
+        m3 = 0.0
+        m4 = 0.0
+        for i in range(start, end + 1):
+            deviation = values[i] - mean
+            squared = deviation * deviation
+            m2 += squared
+            m3 += squared * deviation
+            m4 += squared * squared
+        moments[0, end] = mean
+        moments[1, end] = m2 / window
+        moments[2, end] = m3 / window
+        moments[3, end] = m4 / window
+        moments[4, end] = constant
+    return moments
+
+
+if njit is not None:
+    _central_moments = njit(cache=True)(_central_moments_loop)
+else:
+    _central_moments = _central_moments_numpy
+
+
+def rolling_moments(values, window: int, last_only: bool = False):
+    """
+    Rolling mean, standard deviation, skewness and kurtosis in one pass.
+
+    Matches pandas rolling(window).mean(), .std(), .skew() and .kurt():
+    sample standard deviation, bias-corrected skewness and excess kurtosis,
+    NaN for incomplete windows or windows containing NaN. Uses a Numba
+    kernel when numba is installed and a NumPy kernel otherwise.
+
+    Args:
+        values: Array-like series
+        window: Number of observations per window
+        last_only: Only compute the last window, in constant time whatever
+            the series length
+
+    Returns:
+        tuple: (mean, std, skew, kurt) arrays of the series length, or floats
+        of the last window when last_only is set
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if last_only:
+        moments = _central_moments_numpy(values[-window:], window)[:, -1:]
+        if len(values) < window:
+            moments = np.full((5, 1), np.nan)
+        return tuple(float(stat[0]) for stat in _moments_to_stats(moments, window))
+    return _moments_to_stats(_central_moments(values, window), window)
+
+
+def rolling_zscore(values, window: int, last_only: bool = False):
+    """
+    Z-score of each value against its trailing window's mean and sample std.
+
+    Same as (s - s.rolling(window).mean()) / s.rolling(window).std().
+
+    Args:
+        values: Array-like series
+        window: Number of observations per window
+        last_only: Only compute the z-score of the last value
+
+    Returns:
+        np.ndarray or float: Z-scores, or the last z-score when last_only is set
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean, std = rolling_moments(values, window, last_only)[:2]
+    if last_only:
+        values = values[-1] if len(values) else np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (values - mean) / std
+
+
+def _moments_to_stats(moments: np.ndarray, window: int) -> tuple:
+    """Turn raw (mean, m2, m3, m4, constant) into (mean, std, skew, kurt) like pandas."""
+    mean, m2, m3, m4, constant = moments
+    n = window
+    # Like pandas: constant windows have a skew of 0 and a kurtosis of -3,
+    # other windows with a near zero variance are NaN
+    constant = constant == 1
+    flat = m2 <= 1e-14
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(m2 * n / (n - 1)) if n > 1 else np.full_like(m2, np.nan)
+        if n >= 3:
+            skew = np.sqrt(n * (n - 1)) * m3 / ((n - 2) * m2**1.5)
+            skew = np.where(constant, 0.0, np.where(flat, np.nan, skew))
+        else:
+            skew = np.full_like(m2, np.nan)
+        if n >= 4:
+            kurt = ((n * n - 1) * m4 / (m2 * m2) - 3 * (n - 1) ** 2) / (
+                (n - 2) * (n - 3)
+            )
+            kurt = np.where(constant, -3.0, np.where(flat, np.nan, kurt))
+        else:
+            kurt = np.full_like(m2, np.nan)
+    return mean, std, skew, kurt
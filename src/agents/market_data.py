@@ -1,22 +1,31 @@
 from langchain_openai.chat_models import ChatOpenAI
 
 from agents.state import AgentState
-from tools.api import get_price_API_HYPERLIQUID, get_LS_OI_Copin
+from tools.api import (
+    aget_LS_OI_Copin_report,
+    aget_price_API_HYPERLIQUID,
+    get_LS_OI_Copin_report,
+    get_price_API_HYPERLIQUID,
+)
+from tools.price_frame import PriceFrame
+from tools.resample import DEFAULT_INTERVAL
+
+import asyncio
+import pandas as pd
 
 from datetime import datetime
 
 
-def check_data_valid(crypto, start_date, end_date):
+def resolve_date_range(start_date, end_date):
     """
-    Validate if market data is available for the given crypto and date range.
+    Apply the default date range used by the market data agent.
 
     Args:
-        crypto (str): Cryptocurrency symbol
         start_date (str, optional): Start date in 'YYYY-MM-DD' format. If None, defaults to 1 month before end_date
         end_date (str, optional): End date in 'YYYY-MM-DD' format. If None, defaults to current date
 
     Returns:
-        bool: True if both price and insider trade data are available, False otherwise
+        tuple: (start_date, end_date) as 'YYYY-MM-DD' strings
     """
     # Set default dates
     end_date = end_date or datetime.now().strftime("%Y-%m-%d")
@@ -31,20 +40,114 @@ def check_data_valid(crypto, start_date, end_date):
             )
         )
         start_date = start_date.strftime("%Y-%m-%d")
-    else:
-        start_date = start_date
+    return start_date, end_date
+
 
-    prices = get_price_API_HYPERLIQUID(
-        pair=crypto,
-        open_time=start_date,
-        close_time=end_date,
+def load_market_data(
+    crypto, start_date, end_date, interval=DEFAULT_INTERVAL, prices=None
+):
+    """
+    Fetch and validate the market data for one decision.
+
+    The result is meant to be passed as the initial state data of the graph,
+    so market_data_agent does not fetch the same data a second time.
+
+    Args:
+        crypto (str): Cryptocurrency symbol
+        start_date (str, optional): Start date in 'YYYY-MM-DD' format. If None, defaults to 1 month before end_date
+        end_date (str, optional): End date in 'YYYY-MM-DD' format. If None, defaults to current date
+        interval (str, optional): Candle interval of the prices. Defaults to "1h"
+        prices (optional): Price frame already loaded for the range, e.g. a
+            window sliced out of a longer history, used instead of fetching
+
+    Returns:
+        dict: prices, interval, insider_trades, insider_trades_truncated,
+        start_date and end_date if both price and insider trade data are available
+        None: If any of the data is unavailable
+    """
+    start_date, end_date = resolve_date_range(start_date, end_date)
+
+    if prices is None:
+        prices = _wrap_fetched_prices(
+            get_price_API_HYPERLIQUID(
+                pair=crypto,
+                open_time=start_date,
+                close_time=end_date,
+                interval=interval,
+            )
+        )
+    insider_report = get_LS_OI_Copin_report(pair=crypto)
+    return _validated_market_data(
+        prices, insider_report, start_date, end_date, interval
     )
-    insider_trades = get_LS_OI_Copin(pair=crypto)
-    if isinstance(prices, str) | isinstance(insider_trades, str):
+
+
+async def aload_market_data(crypto, start_date, end_date, interval=DEFAULT_INTERVAL):
+    """
+    Async version of load_market_data, prices and open interest are fetched concurrently.
+
+    Returns:
+        dict: Same as load_market_data
+        None: If any of the data is unavailable
+    """
+    start_date, end_date = resolve_date_range(start_date, end_date)
+
+    prices, insider_report = await asyncio.gather(
+        aget_price_API_HYPERLIQUID(
+            pair=crypto,
+            open_time=start_date,
+            close_time=end_date,
+            interval=interval,
+        ),
+        aget_LS_OI_Copin_report(pair=crypto),
+    )
+    prices = _wrap_fetched_prices(prices)
+    return _validated_market_data(
+        prices, insider_report, start_date, end_date, interval
+    )
+
+
+def _wrap_fetched_prices(prices):
+    """Wrap a frame fresh from a price fetcher in a PriceFrame, without copying it.
+
+    Error messages returned by the fetchers are passed through.
+    """
+    if isinstance(prices, pd.DataFrame):
+        return PriceFrame.from_frame(prices, copy=False)
+    return prices
+
+
+def _validated_market_data(prices, insider_report, start_date, end_date, interval):
+    if isinstance(prices, str) | isinstance(insider_report, str):
         print("Data invalid")
-        return False
-    else:
-        return True
+        return None
+
+    return {
+        "prices": prices,
+        "interval": interval,
+        "start_date": start_date,
+        "end_date": end_date,
+        "insider_trades": (insider_report["long"], insider_report["short"]),
+        "insider_trades_truncated": insider_report["truncated"],
+    }
+
+
+def check_data_valid(crypto, start_date, end_date):
+    """
+    Validate if market data is available for the given crypto and date range.
+
+    Prefer load_market_data when the data is used afterwards, to avoid
+    fetching it twice.
+
+    Args:
+        crypto (str): Cryptocurrency symbol
+        start_date (str, optional): Start date in 'YYYY-MM-DD' format. If None, defaults to 1 month before end_date
+        end_date (str, optional): End date in 'YYYY-MM-DD' format. If None, defaults to current date
+
+    Returns:
+        bool: True if both price and insider trade data are available, False otherwise
+    """
+    return load_market_data(crypto, start_date, end_date) is not None
 
 
 def market_data_agent(state: AgentState):
@@ -56,6 +159,9 @@ def market_data_agent(state: AgentState):
     2. Fetches historical price data from HyperLiquid
     3. Retrieves long/short open interest data from Copin
 
+    Prices and open interest already present in the state (see
+    load_market_data) are reused instead of being fetched again.
+
     Args:
         state (AgentState): Current state containing:
             - messages: List of conversation messages
@@ -63,52 +169,108 @@ def market_data_agent(state: AgentState):
                 - crypto: Cryptocurrency symbol
                 - start_date: Optional start date
                 - end_date: Optional end date
+                - interval: Optional candle interval (default: "1h")
+                - prices: Optional prefetched price data
+                - insider_trades: Optional prefetched open interest data
 
     Returns:
         dict: Updated state with:
             - messages: Original messages
             - data: Original data plus:
-                - prices: Historical OHLCV price data
+                - prices: Historical OHLCV price data as a read-only PriceFrame
+                - interval: Candle interval of the prices
                 - start_date: Processed start date
                 - end_date: Processed end date
                 - insider_trades: Long/short open interest data
+                - insider_trades_truncated: True if open interest hit the position cap
     """
-    messages = state["messages"]
     data = state["data"]
-    # Set default dates
-    end_date = data["end_date"] or datetime.now().strftime("%Y-%m-%d")
-    if not data["start_date"]:
-        # Calculate 1 months before end_date
-        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
-        start_date = (
-            end_date_obj.replace(month=end_date_obj.month - 1)
-            if end_date_obj.month > 1
-            else end_date_obj.replace(
-                year=end_date_obj.year - 1, month=end_date_obj.month + 11
+    start_date, end_date = resolve_date_range(data["start_date"], data["end_date"])
+    interval = data.get("interval", DEFAULT_INTERVAL)
+
+    # Get the historical price data
+    prices = data.get("prices")
+    if prices is None:
+        prices = _wrap_fetched_prices(
+            get_price_API_HYPERLIQUID(
+                pair=data["crypto"],
+                open_time=start_date,
+                close_time=end_date,
+                interval=interval,
             )
         )
-        start_date = start_date.strftime("%Y-%m-%d")
-    else:
-        start_date = data["start_date"]
 
-    # Get the historical price data
+    # Get the insider trades
+    insider_report = None
+    if data.get("insider_trades") is None:
+        insider_report = get_LS_OI_Copin_report(pair=data["crypto"])
 
-    prices = get_price_API_HYPERLIQUID(
-        pair=data["crypto"],
-        open_time=start_date,
-        close_time=end_date,
+    return _market_data_output(
+        state, prices, insider_report, start_date, end_date, interval
     )
 
-    # Get the insider trades
-    insider_trades = get_LS_OI_Copin(pair=data["crypto"])
+
+async def amarket_data_agent(state: AgentState):
+    """
+    Async version of market_data_agent, missing data is fetched concurrently.
+    """
+    data = state["data"]
+    start_date, end_date = resolve_date_range(data["start_date"], data["end_date"])
+    interval = data.get("interval", DEFAULT_INTERVAL)
+
+    async def no_fetch(value):
+        return value
+
+    prices, insider_report = await asyncio.gather(
+        (
+            aget_price_API_HYPERLIQUID(
+                pair=data["crypto"],
+                open_time=start_date,
+                close_time=end_date,
+                interval=interval,
+            )
+            if data.get("prices") is None
+            else no_fetch(data["prices"])
+        ),
+        (
+            aget_LS_OI_Copin_report(pair=data["crypto"])
+            if data.get("insider_trades") is None
+            else no_fetch(None)
+        ),
+    )
+    if data.get("prices") is None:
+        prices = _wrap_fetched_prices(prices)
+
+    return _market_data_output(
+        state, prices, insider_report, start_date, end_date, interval
+    )
+
+
+def _market_data_output(state, prices, insider_report, start_date, end_date, interval):
+    """Merge fetched market data into the state update of the market data agent
+
+    Prices are handed to the other agents as a read-only PriceFrame.
+    """
+    data = state["data"]
+    if isinstance(prices, pd.DataFrame):
+        prices = PriceFrame.from_frame(prices)
+    insider_trades = data.get("insider_trades")
+    insider_trades_truncated = data.get("insider_trades_truncated", False)
+    if isinstance(insider_report, str):
+        insider_trades = insider_report
+    elif insider_report is not None:
+        insider_trades = (insider_report["long"], insider_report["short"])
+        insider_trades_truncated = insider_report["truncated"]
 
     return {
-        "messages": messages,
+        "messages": state["messages"],
         "data": {
             **data,
             "prices": prices,
+            "interval": interval,
             "start_date": start_date,
             "end_date": end_date,
             "insider_trades": insider_trades,
+            "insider_trades_truncated": insider_trades_truncated,
         },
     }
@@ -1,12 +1,20 @@
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
+from pydantic import AliasChoices, BaseModel, Field
+from typing import List, Literal
 from config.analysis_weights import (
     TECHNICAL_ANALYSIS_WEIGHT,
     SENTIMENT_ANALYSIS_WEIGHT,
 )
 from config.llm_config import get_llm
-from agents.state import AgentState, show_agent_reasoning
+from agents.state import AgentState, message_payload, show_agent_reasoning
+from tools.json_codec import loads
+from tools.llm_cache import LLMCache, lookup_llm_response, store_llm_response
+from tools.token_counter import count_tokens
+import json
+import math
 import os
+import re
 from dotenv import load_dotenv
 
 dotenv_path = os.path.join(os.path.dirname(__file__), "../../.env")
@@ -16,12 +24,631 @@ load_dotenv(dotenv_path)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 
+LLM_TEMPERATURE = 0.3
+
+# Numeric value of the analysts' signals in the rule-based decision
+SIGNAL_VALUES = {"bullish": 1, "neutral": 0, "bearish": -1}
+
+# Weighted scores within this band hold, like weighted_signal_combination
+NEUTRAL_SCORE_BAND = 0.2
+
+# Maximum number of LLM requests in flight for one batch of decisions
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+
+# "structured": the LLM fills a PortfolioDecision through the provider's
+# structured output / function calling and the markdown is rendered locally,
+# "text": the LLM writes the markdown decision itself
+LLM_OUTPUT_MODE = os.getenv("LLM_OUTPUT_MODE", "structured").lower()
+
+# "full": the analysts' JSON messages and formatting instructions,
+# "compact": only the fields the decision needs, in a terse fixed format
+LLM_PROMPT_MODE = os.getenv("LLM_PROMPT_MODE", "full").lower()
+
+# Maximum prompt tokens, 0 for no limit. A full prompt over budget is sent in
+# the compact format instead.
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", 0))
+
+
+class AgentSignal(BaseModel):
+    """Signal of one analyst as weighed by the portfolio manager"""
+
+    agent_name: str
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float = Field(description="Between 0 and 1")
+
+
+class PortfolioDecision(BaseModel):
+    """Final trading decision of the portfolio manager"""
+
+    action: Literal["long", "short"]
+    volatility: str = Field(description="Volatility from the risk manager")
+    stop_loss: str = Field(
+        description="Stop loss from the risk manager",
+        validation_alias=AliasChoices("stop_loss", "stop loss"),
+        serialization_alias="stop loss",
+    )
+    take_profit: str = Field(
+        description="Take profit from the risk manager",
+        validation_alias=AliasChoices("take_profit", "take profit"),
+        serialization_alias="take profit",
+    )
+    quantity: int = Field(ge=0, description="At most max_position_margin")
+    confidence: float = Field(description="Between 0 and 1")
+    agent_signals: List[AgentSignal]
+    reasoning: str = Field(
+        description="Concise explanation of the decision, including how the "
+        "signals were weighted, the stop loss and take profit and the quantity"
+    )
+
+    def to_content(self) -> str:
+        """Serialize to the JSON decision read by Backtester.parse_action"""
+        return self.model_dump_json(by_alias=True)
+
+
+# Prompt templates, built once per process
+PORTFOLIO_SYSTEM_PROMPT = f"""You are a portfolio manager making final trading decisions.
+            Your job is to make a trading decision based on the team's analysis while strictly adhering
+            to risk management constraints.
+
+            RISK MANAGEMENT CONSTRAINTS:
+            - You MUST NOT exceed the max_position_size specified by the risk manager
+            - You MUST follow the stop loss, price to set stop loss recommended by risk management
+            - These are hard constraints that cannot be overridden by other signals
+
+            When weighing the different signals for direction and timing:
+
+            1. Technical Analysis ({TECHNICAL_ANALYSIS_WEIGHT}% weight)
+               - Secondary confirmation
+               - Helps with entry/exit timing
+
+            2. Sentiment Analysis ({SENTIMENT_ANALYSIS_WEIGHT}% weight)
+               - Final consideration
+               - Can influence sizing within risk limits
+
+            The decision process should be:
+            1. First check risk management constraints
+            2. Use technical analysis for timing
+            3. Consider sentiment for final adjustment
+            Provide the following in your output:
+            - "action": "long" | "short"
+            - "volatility": <volatility from Risk manager>
+            - "stop loss" : <stop loss from Risk Management>
+            - "take profit" : <take profit from Risk Management>
+            - "quantity": <positive integer>
+            - "confidence": <float between 0 and 1>
+            - "agent_signals": <list of agent signals including agent name, signal (bullish | bearish | neutral), and their confidence>
+            - "reasoning": <concise explanation of the decision including how you weighted the signals>
+            Format the output so it is easy for users to read.
+            Trading Rules:
+            - Never exceed risk management position limits
+            - Quantity must be ≤ current position for sells
+            - Quantity must be ≤ max_position_margin from risk management"""
+
+PORTFOLIO_HUMAN_PROMPT = """Based on the team's analysis below, make your trading decision.
+
+            Technical Analysis Trading Signal: {technical_message}
+            Sentiment Analysis Trading Signal: {sentiment_message}
+            Risk Management : {risk_message}
+
+            Here is the current portfolio:
+            Portfolio:
+            :
+            | Cash         | {portfolio_cash}     |
+            |---------     |---------|
+            | Leverage     | {portfolio_leverage} |
+            |---------     |---------|
+            | Risk     | {portfolio_risk} |
+"""
+
+# Formatting instructions, only needed when the LLM writes the markdown itself
+PORTFOLIO_MARKDOWN_INSTRUCTIONS = """
+            Add these points to reasoning:
+            - Stop Loss and Take profit values based on cryptocurrency volatility and leverage and the leverage
+            - Quantity value based on risk
+
+            ALWAYS format them in markdown tables.
+            Table format example:
+            | Column1 | Column2 | Column3 |
+            |---------|---------|---------|
+            | data1   | data2   | data3   |
+
+            Never use bullet points or numbered lists for data presentation.
+
+            Only include the Portfolio, action, quantity, volatility, stop loss, reasoning, confidence, and agent_signals in your output as response.
+            Just for reasoning, Use bullet points to separate main ideas
+            Use percentage to represent the confidence
+            Remember, the action must be either long, short.
+            """
+
+PORTFOLIO_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", PORTFOLIO_SYSTEM_PROMPT),
+        ("human", PORTFOLIO_HUMAN_PROMPT + PORTFOLIO_MARKDOWN_INSTRUCTIONS),
+    ]
+)
+
+STRUCTURED_PORTFOLIO_PROMPT = ChatPromptTemplate.from_messages(
+    [("system", PORTFOLIO_SYSTEM_PROMPT), ("human", PORTFOLIO_HUMAN_PROMPT)]
+)
+
+
+COMPACT_PORTFOLIO_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            f"""Crypto portfolio manager. Decide long or short from the team's signals.
+Weights: technical {TECHNICAL_ANALYSIS_WEIGHT}%, sentiment {SENTIMENT_ANALYSIS_WEIGHT}%.
+Hard rules: quantity <= max_position_margin; keep the risk manager's volatility, stop loss and take profit.
+Reply with a JSON object only: action (long|short), volatility, stop loss, take profit, quantity (int), confidence (0-1), agent_signals (agent_name, signal, confidence), reasoning (short).""",
+        ),
+        ("human", "{analysis}"),
+    ]
+)
+
+
 ##### Portfolio Management Agent #####
 def portfolio_management_agent(state: AgentState):
-    """Makes final trading decisions and generates orders"""
-    show_reasoning = state["metadata"]["show_reasoning"]
+    """Makes final trading decisions and generates orders
+
+    Responses are served from the LLM response cache (see tools/llm_cache.py)
+    when the same prompt was already sent to the same model. In the
+    structured output mode the content is the JSON of a PortfolioDecision.
+
+    When the run streams (metadata "stream" or "on_decision"), tokens are
+    consumed as they arrive and the on_decision callback is called as soon as
+    the action and quantity have been emitted, while the reasoning is still
+    streaming.
+    """
+    prompt, llm, cache_key = _prepare_decision(state)
+
+    content = lookup_llm_response(cache_key)
+    if content is not None:
+        return _decision_output(state, content)
+
+    if not _is_streaming(state):
+        content = _response_content(llm.invoke(prompt))
+        store_llm_response(cache_key, content)
+        return _decision_output(state, content)
+
+    stream = _DecisionStream(state)
+    for chunk in _streaming_llm(llm).stream(prompt):
+        stream.feed(chunk)
+    content = stream.content()
+    store_llm_response(cache_key, content)
+    return _decision_output(state, content, notify=not stream.notified)
+
+
+async def aportfolio_management_agent(state: AgentState):
+    """Async version of portfolio_management_agent, awaits the LLM call"""
+    prompt, llm, cache_key = _prepare_decision(state)
+
+    content = lookup_llm_response(cache_key)
+    if content is not None:
+        return _decision_output(state, content)
+
+    if not _is_streaming(state):
+        content = _response_content(await llm.ainvoke(prompt))
+        store_llm_response(cache_key, content)
+        return _decision_output(state, content)
+
+    stream = _DecisionStream(state)
+    async for chunk in _streaming_llm(llm).astream(prompt):
+        stream.feed(chunk)
+    content = stream.content()
+    store_llm_response(cache_key, content)
+    return _decision_output(state, content, notify=not stream.notified)
+
+
+def _is_streaming(state: AgentState) -> bool:
+    """Whether the run asked for a streamed decision"""
+    metadata = state["metadata"]
+    return bool(metadata.get("stream") or metadata.get("on_decision"))
+
+
+# Action and quantity as emitted in JSON ("action": "long") or key/value
+# markdown rows (| Action | long |). The quantity only matches once a character
+# that cannot continue it follows, so a number still being streamed is not
+# reported truncated.
+ACTION_PATTERN = re.compile(r"\baction\b\W{0,8}\b(long|short|hold)\b", re.IGNORECASE)
+QUANTITY_PATTERN = re.compile(
+    r"\bquantity\b\W{0,8}(\d[\d,]*(?:\.\d+)?)(?=[^\d,.]|[,.][^\d])",
+    re.IGNORECASE,
+)
+ACTION_VALUE = re.compile(r"(long|short|hold)", re.IGNORECASE)
+QUANTITY_VALUE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def _table_values(text: str) -> dict:
+    """Read the Action and Quantity columns of markdown tables with a header row
+
+    Only complete rows (closed by a trailing "|") are read, so a cell still
+    being streamed is not reported truncated.
+    """
+    values = {}
+    columns = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not (line.startswith("|") and line.endswith("|") and len(line) > 1):
+            columns = None
+            continue
+        cells = [cell.strip().strip("*`").lower() for cell in line[1:-1].split("|")]
+        if all(set(cell) <= set("-: ") for cell in cells):
+            continue
+        if "action" in cells or "quantity" in cells:
+            columns = {
+                key: cells.index(key) for key in ("action", "quantity") if key in cells
+            }
+            continue
+        if columns:
+            for key, column in columns.items():
+                if column < len(cells):
+                    values.setdefault(key, cells[column])
+            columns = None
+    return values
+
+
+def _parse_quantity(value: str):
+    value = value.replace(",", "")
+    return float(value) if "." in value else int(value)
+
+
+def extract_action_quantity(text: str):
+    """Extract the action and quantity from a possibly partial LLM output
+
+    Reads JSON keys, key/value markdown rows and markdown tables with an
+    Action and a Quantity column under a header row.
+
+    Args:
+        text: JSON or markdown decision streamed so far
+
+    Returns:
+        tuple: (action, quantity), or None until both have been emitted
+
+    Examples:
+        >>> extract_action_quantity('{"action": "long", "quantity": 1500}')
+        ('long', 1500)
+        >>> extract_action_quantity("| Action | short |\\n| Quantity | 1,500.5 |\\n")
+        ('short', 1500.5)
+        >>> extract_action_quantity("| Action | Quantity |\\n|-|-|\\n| long | 20 |\\n")
+        ('long', 20)
+        >>> extract_action_quantity("transaction hold, quantity 10 ")
+        >>> extract_action_quantity('{"action": "long", "quantity": 15')
+    """
+    action = ACTION_PATTERN.search(text)
+    quantity = QUANTITY_PATTERN.search(text)
+    action = action.group(1) if action else None
+    quantity = quantity.group(1) if quantity else None
+    if action is None or quantity is None:
+        table = _table_values(text)
+        if action is None and ACTION_VALUE.fullmatch(table.get("action", "")):
+            action = table["action"]
+        if quantity is None and QUANTITY_VALUE.fullmatch(table.get("quantity", "")):
+            quantity = table["quantity"]
+    if action is None or quantity is None:
+        return None
+    return action.lower(), _parse_quantity(quantity)
+
+
+class _DecisionStream:
+    """Accumulates a streamed decision and reports the action early
+
+    Chunks are the AIMessageChunks of the text mode, or the {"raw", "parsed",
+    "parsing_error"} chunks of the structured output mode, whose raw chunks
+    carry the decision JSON as content or as tool call arguments.
+    """
+
+    def __init__(self, state: AgentState):
+        self.crypto = state["data"]["crypto"]
+        self.echo = state["metadata"].get("stream", False)
+        self.on_decision = state["metadata"].get("on_decision")
+        self.structured = LLM_OUTPUT_MODE == "structured"
+        self.text = ""
+        self.decision = None
+        self.parsing_error = None
+        self.notified = False
+
+    def feed(self, chunk) -> None:
+        if self.structured:
+            if chunk.get("parsed") is not None:
+                self.decision = chunk["parsed"]
+            if chunk.get("parsing_error") is not None:
+                self.parsing_error = chunk["parsing_error"]
+            chunk = chunk.get("raw")
+        text = _chunk_text(chunk)
+        if not text:
+            return
+        self.text += text
+        if self.echo:
+            print(text, end="", flush=True)
+        if not self.notified:
+            early = extract_action_quantity(self.text)
+            if early is not None:
+                self._notify(*early)
+
+    def content(self) -> str:
+        """Return the complete decision content once the stream has ended"""
+        if self.echo:
+            print()
+        if not self.structured:
+            return self.text
+        if self.decision is None:
+            raise ValueError(
+                f"The LLM returned no structured decision: {self.parsing_error}"
+            )
+        return self.decision.to_content()
+
+    def _notify(self, action: str, quantity: int) -> None:
+        self.notified = True
+        if self.on_decision is not None:
+            self.on_decision(self.crypto, action, quantity)
+
+
+def _chunk_text(chunk) -> str:
+    """Return the text streamed by a message chunk, tool call arguments included"""
+    if chunk is None:
+        return ""
+    content = chunk.content
+    if isinstance(content, list):
+        content = "".join(
+            part if isinstance(part, str) else part.get("text", "") for part in content
+        )
+    tool_args = "".join(
+        tool_call.get("args") or "" for tool_call in getattr(chunk, "tool_call_chunks", [])
+    )
+    return content + tool_args
+
+
+def rule_based_portfolio_agent(state: AgentState):
+    """Makes the final trading decision without calling the LLM
+
+    Combines the technical and sentiment signals with the weights of
+    config/analysis_weights.py and sizes the position as a share of the risk
+    manager's max_position_margin (see calculate_rule_based_decision). The
+    output has the same JSON shape as the LLM
+    decision, so it is a drop-in replacement for portfolio_management_agent
+    and a baseline to compare it against.
+    """
+    return _decision_output(state, _rule_based_decision_content(state))
+
+
+def calculate_rule_based_decision(
+    technical_signal: str,
+    technical_confidence: float,
+    sentiment_signal: str,
+    sentiment_confidence: float,
+    max_position_margin: float,
+) -> tuple:
+    """Derive the action and quantity from the analysts' signals
+
+    The signals are combined into a weighted score between -1 and 1. Scores
+    within NEUTRAL_SCORE_BAND of zero hold, the same band as
+    weighted_signal_combination, so a weak signal on its own does not open a
+    position. Otherwise the position goes long or short with a quantity of
+    max_position_margin scaled by the absolute score.
+
+    Args:
+        technical_signal: "bullish", "bearish" or "neutral"
+        technical_confidence: Confidence of the technical signal, between 0 and 1
+        sentiment_signal: "bullish", "bearish" or "neutral"
+        sentiment_confidence: Confidence of the sentiment signal, between 0 and 1
+        max_position_margin: Position limit from the risk manager
+
+    Returns:
+        tuple: (action, quantity, confidence) where action is long, short or
+        hold and confidence is the absolute weighted score
+    """
+    weighted_sum = (
+        TECHNICAL_ANALYSIS_WEIGHT * SIGNAL_VALUES[technical_signal] * technical_confidence
+        + SENTIMENT_ANALYSIS_WEIGHT * SIGNAL_VALUES[sentiment_signal] * sentiment_confidence
+    )
+    score = weighted_sum / (TECHNICAL_ANALYSIS_WEIGHT + SENTIMENT_ANALYSIS_WEIGHT)
+
+    if abs(score) <= NEUTRAL_SCORE_BAND or not math.isfinite(max_position_margin):
+        return "hold", 0, abs(score)
+    action = "long" if score > 0 else "short"
+    return action, int(max_position_margin * abs(score)), abs(score)
+
+
+def _rule_based_decision_content(state: AgentState) -> str:
+    """Build the JSON decision of rule_based_portfolio_agent from the team's messages"""
+    technical = _agent_message_content(state, "technical_analyst_agent")
+    sentiment = _agent_message_content(state, "sentiment_agent")
+    risk = _agent_message_content(state, "risk_management_agent")
+
+    technical_confidence = float(technical["confidence"].rstrip("%")) / 100
+    sentiment_confidence = float(sentiment["confidence"].rstrip("%")) / 100
+    action, quantity, confidence = calculate_rule_based_decision(
+        technical["signal"],
+        technical_confidence,
+        sentiment["signal"],
+        sentiment_confidence,
+        risk["max_position_margin"],
+    )
+
+    return json.dumps(
+        {
+            "action": action,
+            "volatility": risk["risk_metrics"]["volatility"],
+            "stop loss": risk["risk_metrics"]["stop loss"],
+            "take profit": risk["risk_metrics"]["take profit"],
+            "quantity": quantity,
+            "confidence": round(confidence, 4),
+            "agent_signals": [
+                {
+                    "agent_name": "technical_analyst_agent",
+                    "signal": technical["signal"],
+                    "confidence": technical_confidence,
+                },
+                {
+                    "agent_name": "sentiment_agent",
+                    "signal": sentiment["signal"],
+                    "confidence": sentiment_confidence,
+                },
+            ],
+            "reasoning": f"Rule-based decision: technical {technical['signal']} "
+            f"({TECHNICAL_ANALYSIS_WEIGHT}% weight), sentiment {sentiment['signal']} "
+            f"({SENTIMENT_ANALYSIS_WEIGHT}% weight), weighted score {confidence:.2f}, "
+            f"quantity scaled from max_position_margin by the score",
+        }
+    )
+
+
+def _agent_message_content(state: AgentState, name: str) -> dict:
+    """Return the typed payload of an analyst's message"""
+    return message_payload(next(msg for msg in state["messages"] if msg.name == name))
+
+
+def decide_portfolio_batch(states: list, max_concurrency: int = None) -> list:
+    """Make the portfolio decision for many analysed states at once
+
+    States in the "rules" decision mode are decided by the rule-based path.
+    Every other prompt not found in the LLM response cache is sent in one
+    llm.batch call, with at most max_concurrency requests in flight. Request
+    rate is additionally bounded by the client's rate limiter (see
+    LLM_REQUESTS_PER_SECOND in config/llm_config.py).
+
+    Args:
+        states: Graph states that went through the risk management agent
+        max_concurrency: Maximum concurrent LLM requests (default: LLM_MAX_CONCURRENCY)
+
+    Returns:
+        list: Final state, or the exception raised, for each input state
+    """
+    prepared, results, misses = _prepare_batch(states)
+    for llm, indices in misses.values():
+        responses = llm.batch(
+            [prepared[i][0] for i in indices],
+            config={"max_concurrency": max_concurrency or LLM_MAX_CONCURRENCY},
+            return_exceptions=True,
+        )
+        _collect_batch(prepared, results, indices, responses)
+    return _batch_output(states, results)
+
+
+async def adecide_portfolio_batch(states: list, max_concurrency: int = None) -> list:
+    """Async version of decide_portfolio_batch, sends the prompts with llm.abatch"""
+    prepared, results, misses = _prepare_batch(states)
+    for llm, indices in misses.values():
+        responses = await llm.abatch(
+            [prepared[i][0] for i in indices],
+            config={"max_concurrency": max_concurrency or LLM_MAX_CONCURRENCY},
+            return_exceptions=True,
+        )
+        _collect_batch(prepared, results, indices, responses)
+    return _batch_output(states, results)
+
+
+def _prepare_batch(states: list):
+    """Render every prompt and serve what the LLM response cache already has
+
+    Returns:
+        tuple: (prepared, results, misses) where prepared holds the
+        (prompt, llm, cache_key) of each LLM state, results the cached or
+        rule-based content or exception per state (None for misses) and misses maps id(llm) to
+        (llm, indices of the states it still has to answer)
+    """
+    prepared = [None] * len(states)
+    results = [None] * len(states)
+    misses = {}
+    for i, state in enumerate(states):
+        try:
+            if state["metadata"].get("decision_mode") == "rules":
+                results[i] = _rule_based_decision_content(state)
+                continue
+            prepared[i] = _prepare_decision(state)
+            results[i] = lookup_llm_response(prepared[i][2])
+        except Exception as e:
+            results[i] = e
+            continue
+        if results[i] is None:
+            llm = prepared[i][1]
+            misses.setdefault(id(llm), (llm, []))[1].append(i)
+    return prepared, results, misses
+
+
+def _collect_batch(prepared: list, results: list, indices: list, responses: list):
+    """Store the batch responses in results and in the LLM response cache"""
+    for i, response in zip(indices, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            results[i] = _response_content(response)
+        except Exception as e:
+            results[i] = e
+        else:
+            store_llm_response(prepared[i][2], results[i])
+
+
+def _batch_output(states: list, results: list) -> list:
+    """Merge each decision into its state, passing exceptions through"""
+    outputs = []
+    for state, content in zip(states, results):
+        if isinstance(content, Exception):
+            outputs.append(content)
+        else:
+            outputs.append({**state, **_decision_output(state, content)})
+    return outputs
+
+
+def _prepare_decision(state: AgentState):
+    """Render the decision prompt from the team's messages and get the LLM
+
+    The prompt's token count is printed on every call and checked against
+    LLM_PROMPT_TOKEN_BUDGET.
+
+    Returns:
+        tuple: (prompt, llm, cache_key) where llm returns a PortfolioDecision
+        in the structured output mode and a message in the text mode
+    """
+    structured = LLM_OUTPUT_MODE == "structured"
+
+    # Get the LLM (can be configured via environment variable or parameter)
+    llm_provider = os.getenv("LLM_PROVIDER", "openai")  # or "azure"
+    llm = get_llm(provider=llm_provider, temperature=LLM_TEMPERATURE)
+
+    model_name = (
+        getattr(llm, "deployment_name", None)
+        or getattr(llm, "model_name", None)
+        or getattr(llm, "model", None)
+    )
+
+    # Generate the prompt
+    compact = LLM_PROMPT_MODE == "compact"
+    prompt = _render_prompt(state, compact, structured)
+    prompt_text = prompt.to_string()
+    prompt_tokens = count_tokens(prompt_text, str(model_name))
+    if LLM_PROMPT_TOKEN_BUDGET and prompt_tokens > LLM_PROMPT_TOKEN_BUDGET and not compact:
+        prompt = _render_prompt(state, True, structured)
+        prompt_text = prompt.to_string()
+        prompt_tokens = count_tokens(prompt_text, str(model_name))
+    crypto = state["data"]["crypto"]
+    if LLM_PROMPT_TOKEN_BUDGET and prompt_tokens > LLM_PROMPT_TOKEN_BUDGET:
+        print(
+            f"Portfolio prompt for {crypto} uses {prompt_tokens} "
+            f"tokens, over the budget of {LLM_PROMPT_TOKEN_BUDGET}"
+        )
+    else:
+        print(f"Portfolio prompt for {crypto}: {prompt_tokens} tokens")
+
+    cache_key = LLMCache.make_key(
+        llm_provider, str(model_name), LLM_TEMPERATURE, prompt_text, LLM_OUTPUT_MODE
+    )
+
+    if structured:
+        llm = _get_structured_llm(llm)
+
+    return prompt, llm, cache_key
+
+
+def _render_prompt(state: AgentState, compact: bool, structured: bool):
+    """Render the full or compact decision prompt of a state"""
     portfolio = state["data"]["portfolio"]
 
+    if compact:
+        return COMPACT_PORTFOLIO_PROMPT.invoke(
+            {"analysis": compact_analysis(state)}
+        )
+
     # Get the technical analyst, fundamentals agent, and risk management agent messages
     technical_message = next(
         msg for msg in state["messages"] if msg.name == "technical_analyst_agent"
@@ -33,89 +660,8 @@ def portfolio_management_agent(state: AgentState):
         msg for msg in state["messages"] if msg.name == "risk_management_agent"
     )
 
-    # Create the prompt template
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                f"""You are a portfolio manager making final trading decisions.
-                Your job is to make a trading decision based on the team's analysis while strictly adhering
-                to risk management constraints.
-
-                RISK MANAGEMENT CONSTRAINTS:
-                - You MUST NOT exceed the max_position_size specified by the risk manager
-                - You MUST follow the stop loss, price to set stop loss recommended by risk management
-                - These are hard constraints that cannot be overridden by other signals
-
-                When weighing the different signals for direction and timing:
-
-                1. Technical Analysis ({TECHNICAL_ANALYSIS_WEIGHT}% weight)
-                   - Secondary confirmation
-                   - Helps with entry/exit timing
-
-                2. Sentiment Analysis ({SENTIMENT_ANALYSIS_WEIGHT}% weight)
-                   - Final consideration
-                   - Can influence sizing within risk limits
-
-                The decision process should be:
-                1. First check risk management constraints
-                2. Use technical analysis for timing
-                3. Consider sentiment for final adjustment
-                Provide the following in your output:
-                - "action": "long" | "short"
-                - "volatility": <volatility from Risk manager>
-                - "stop loss" : <stop loss from Risk Management>
-                - "take profit" : <take profit from Risk Management>
-                - "quantity": <positive integer>
-                - "confidence": <float between 0 and 1>
-                - "agent_signals": <list of agent signals including agent name, signal (bullish | bearish | neutral), and their confidence>
-                - "reasoning": <concise explanation of the decision including how you weighted the signals>
-                Format the output so it is easy for users to read.
-                Trading Rules:
-                - Never exceed risk management position limits
-                - Quantity must be ≤ current position for sells
-                - Quantity must be ≤ max_position_margin from risk management""",
-            ),
-            (
-                "human",
-                """Based on the team's analysis below, make your trading decision.
-
-                Technical Analysis Trading Signal: {technical_message}
-                Sentiment Analysis Trading Signal: {sentiment_message}
-                Risk Management : {risk_message}
-
-                Here is the current portfolio:
-                Portfolio:
-                :
-                | Cash         | {portfolio_cash}     |
-                |---------     |---------|
-                | Leverage     | {portfolio_leverage} |
-                |---------     |---------|
-                | Risk     | {portfolio_risk} |
-
-                Add these points to reasoning:
-                - Stop Loss and Take profit values based on cryptocurrency volatility and leverage and the leverage
-                - Quantity value based on risk
-
-                ALWAYS format them in markdown tables.
-                Table format example:
-                | Column1 | Column2 | Column3 |
-                |---------|---------|---------|
-                | data1   | data2   | data3   |
-
-                Never use bullet points or numbered lists for data presentation.
-
-                Only include the Portfolio, action, quantity, volatility, stop loss, reasoning, confidence, and agent_signals in your output as response.
-                Just for reasoning, Use bullet points to separate main ideas
-                Use percentage to represent the confidence
-                Remember, the action must be either long, short.
-                """,
-            ),
-        ]
-    )
-
-    # Generate the prompt
-    prompt = template.invoke(
+    template = STRUCTURED_PORTFOLIO_PROMPT if structured else PORTFOLIO_PROMPT
+    return template.invoke(
         {
             "technical_message": technical_message.content,
             "sentiment_message": sentiment_message.content,
@@ -125,30 +671,154 @@ def portfolio_management_agent(state: AgentState):
             "portfolio_risk": f"{portfolio['risk']:.2f}",
         }
     )
-    # Get the LLM (can be configured via environment variable or parameter)
-    llm_provider = os.getenv("LLM_PROVIDER", "openai")  # or "azure"
-    llm = get_llm(provider=llm_provider, temperature=0.3)
 
-    # Generate the prompt and invoke the LLM
-    prompt = template.invoke({
-        "technical_message": technical_message.content,
-        "sentiment_message": sentiment_message.content,
-        "risk_message": risk_message.content,
-        "portfolio_cash": f"{portfolio['cash']:.2f}",
-        "portfolio_leverage": f"{portfolio['leverage']:.2f}",
-        "portfolio_risk": f"{portfolio['risk']:.2f}",
-    })
 
-    result = llm.invoke(prompt)
+def compact_analysis(state: AgentState) -> str:
+    """Serialize the fields the decision needs in a terse fixed format
+
+    Example:
+        technical: bearish 60% | trend bullish 55% | mean_reversion neutral 50% | ...
+        sentiment: bullish 67% | Bullish signals: 100, Bearish signals: 50
+        risk: max_position_margin 10000.00 | volatility 0.97% | stop loss 9.71% | take profit 9.71%
+        portfolio: cash 100000.00 | leverage 10.00 | risk 0.05
+    """
+    technical = _agent_message_content(state, "technical_analyst_agent")
+    sentiment = _agent_message_content(state, "sentiment_agent")
+    risk = _agent_message_content(state, "risk_management_agent")
+    portfolio = state["data"]["portfolio"]
+
+    strategies = " | ".join(
+        f"{name} {signal['signal']} {signal['confidence']}"
+        for name, signal in technical.get("strategy_signals", {}).items()
+    )
+    risk_metrics = " | ".join(
+        f"{name} {value}" for name, value in risk["risk_metrics"].items()
+    )
+    return "\n".join(
+        [
+            f"technical: {technical['signal']} {technical['confidence']} | {strategies}",
+            f"sentiment: {sentiment['signal']} {sentiment['confidence']} | {sentiment['reasoning']}",
+            f"risk: max_position_margin {risk['max_position_margin']:.2f} | {risk_metrics}",
+            f"portfolio: cash {portfolio['cash']:.2f} | leverage {portfolio['leverage']:.2f} "
+            f"| risk {portfolio['risk']:.2f}",
+        ]
+    )
+
+
+_structured_llms = {}
+
+# Structured LLM id -> the same binding with include_raw=True, which keeps the
+# raw message chunks that streaming reads
+_streaming_llms = {}
+
 
-    # Create the portfolio management message
+def _get_structured_llm(llm):
+    """Return llm bound to the PortfolioDecision schema, built once per client"""
+    # Clients are shared through the config.llm_config registry, so their id is stable
+    if id(llm) not in _structured_llms:
+        structured_llm = llm.with_structured_output(PortfolioDecision)
+        _streaming_llms[id(structured_llm)] = llm.with_structured_output(
+            PortfolioDecision, include_raw=True
+        )
+        _structured_llms[id(llm)] = structured_llm
+    return _structured_llms[id(llm)]
+
+
+def _streaming_llm(llm):
+    """Return the runnable to stream a decision from, see _DecisionStream"""
+    return _streaming_llms.get(id(llm), llm)
+
+
+def _response_content(response) -> str:
+    """Return the decision content of an LLM response"""
+    if isinstance(response, PortfolioDecision):
+        return response.to_content()
+    if response is None:
+        raise ValueError("The LLM returned no structured decision")
+    return response.content
+
+
+def _decision_output(state: AgentState, content: str, notify: bool = True):
+    """Wrap the LLM decision into the portfolio management message
+
+    Calls the run's on_decision callback unless the streamed decision already
+    did.
+    """
+    on_decision = state["metadata"].get("on_decision")
+    if notify and on_decision is not None:
+        decision = extract_action_quantity(content + "\n")
+        if decision is not None:
+            on_decision(state["data"]["crypto"], *decision)
+
+    # Create the portfolio management message, JSON decisions also carry
+    # their typed payload (see agents.state.agent_message)
+    payload = _decision_payload(content)
     message = HumanMessage(
-        content=result.content,
+        content=content,
         name="portfolio_management",
+        additional_kwargs={} if payload is None else {"payload": payload},
     )
 
     # Print the decision if the flag is set
-    if show_reasoning:
-        show_agent_reasoning(message.content, "Portfolio Management Agent")
+    if state["metadata"]["show_reasoning"]:
+        show_agent_reasoning(
+            render_decision_markdown(message.content), "Portfolio Management Agent"
+        )
 
     return {"messages": state["messages"] + [message]}
+
+
+def _decision_payload(content: str):
+    """Return the decoded decision of a JSON decision content, None for text"""
+    try:
+        decision = loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return decision if isinstance(decision, dict) else None
+
+
+def render_decision_markdown(content: str) -> str:
+    """Render a JSON decision as markdown tables
+
+    Args:
+        content: Decision content, as produced by the structured output mode
+            or by rule_based_portfolio_agent
+
+    Returns:
+        str: Markdown rendering, or content unchanged if it is not a JSON decision
+    """
+    decision = _decision_payload(content)
+    if decision is None:
+        return content
+
+    lines = [
+        "| Field | Value |",
+        "|---------|---------|",
+    ]
+    for field in ("action", "quantity", "volatility", "stop loss", "take profit"):
+        lines.append(f"| {field.title()} | {decision.get(field, '')} |")
+    lines.append(f"| Confidence | {_format_confidence(decision.get('confidence'))} |")
+
+    agent_signals = decision.get("agent_signals") or []
+    if agent_signals:
+        lines += [
+            "",
+            "| Agent | Signal | Confidence |",
+            "|---------|---------|---------|",
+        ]
+        for agent_signal in agent_signals:
+            lines.append(
+                f"| {agent_signal.get('agent_name', '')} "
+                f"| {agent_signal.get('signal', '')} "
+                f"| {_format_confidence(agent_signal.get('confidence'))} |"
+            )
+
+    lines += ["", "**Reasoning**", "", str(decision.get("reasoning", ""))]
+    return "\n".join(lines)
+
+
+def _format_confidence(confidence) -> str:
+    """Format a 0-1 confidence as a percentage"""
+    if isinstance(confidence, (int, float)) and not isinstance(confidence, bool):
+        return f"{confidence:.0%}" if confidence <= 1 else f"{confidence:.0f}%"
+    return "" if confidence is None else str(confidence)
@@ -1,10 +1,7 @@
 import math
 
-from langchain_core.messages import HumanMessage
+from agents.state import AgentState, agent_message, show_agent_reasoning
 
-from agents.state import AgentState, show_agent_reasoning
-
-import json
 import ast
 
 
@@ -35,17 +32,15 @@ def risk_management_agent(state: AgentState):
     prices_df = data["prices"]
 
     # 1. Calculate volatility
-    prices_df["returns"] = prices_df["close"].pct_change()
-    prices_df.dropna(inplace=True)
-    prices_df["volatility_24"] = prices_df["returns"].rolling(window=24).std()
-    volatility = prices_df["volatility_24"].mean()
+    returns = prices_df["close"].pct_change().dropna()
+    volatility_24 = returns.rolling(window=24).std()
+    volatility = volatility_24.mean()
 
     # 2. Position Size Limits
     max_loss_cash = cash * max_loss
-    max_position_size = max_loss_cash / volatility
-    if max_position_size > cash:
-        max_position_size = cash
-    max_position_margin = max_position_size / leverage
+    max_position_margin = calculate_max_position_margin(
+        cash, max_loss, leverage, volatility
+    )
 
     # 3. Stop loss, Price Stop Loss
     stop_loss = "{:.2%}".format(volatility * leverage)
@@ -64,12 +59,49 @@ def risk_management_agent(state: AgentState):
     }
 
     # Create the risk management message
-    message = HumanMessage(
-        content=json.dumps(message_content),
-        name="risk_management_agent",
-    )
+    message = agent_message(message_content, "risk_management_agent")
 
     if show_reasoning:
         show_agent_reasoning(message_content, "Risk Management Agent")
 
     return {"messages": state["messages"] + [message]}
+
+
+def calculate_max_position_margin(cash, max_loss, leverage, volatility):
+    """Maximum margin for a new position given the portfolio and volatility.
+
+    The position is sized so that a one-volatility move loses at most
+    cash * max_loss, capped at the available cash, then divided by leverage.
+
+    Args:
+        cash: Cash available in the portfolio
+        max_loss: Proportion of the cash that can be lost per trade
+        leverage: Leverage applied to the position
+        volatility: Volatility of the asset returns
+
+    Returns:
+        float: Maximum position margin
+    """
+    max_position_size = min(cash * max_loss / volatility, cash)
+    return max_position_size / leverage
+
+
+def calculate_risk_frame(prices_df, window_bars: int = 720):
+    """Vectorized volatility used by risk_management_agent for every row.
+
+    risk_management_agent averages the 24-bar rolling volatility over its whole
+    price window; here that average is taken over the trailing window_bars rows
+    so each row matches an agent run whose window ended at that row.
+
+    Args:
+        prices_df: DataFrame with a 'close' column
+        window_bars: Number of bars in the agent's price window (30 days of 1h bars)
+
+    Returns:
+        pd.DataFrame: DataFrame with a 'volatility' column
+    """
+    returns = prices_df["close"].pct_change()
+    volatility_24 = returns.rolling(window=24).std()
+    return volatility_24.rolling(window_bars, min_periods=1).mean().to_frame(
+        "volatility"
+    )
@@ -1,13 +1,9 @@
-from langchain_core.messages import HumanMessage
-
-from agents.state import AgentState, show_agent_reasoning
+from agents.state import AgentState, agent_message, show_agent_reasoning
 
 import pandas as pd
 
 import numpy as np
 
-import json
-
 
 ##### Sentiment Agent #####
 def sentiment_agent(state: AgentState):
@@ -30,6 +26,44 @@ def sentiment_agent(state: AgentState):
     bullish_signals = round(bullish_signals)
     bearish_signals = round(bearish_signals)
 
+    overall_signal, confidence = calculate_sentiment_signal(
+        bullish_signals, bearish_signals
+    )
+
+    message_content = {
+        "signal": overall_signal,
+        "confidence": f"{round(confidence * 100)}%",
+        "reasoning": f"Bullish signals: {bullish_signals}, Bearish signals: {bearish_signals}",
+    }
+    if data.get("insider_trades_truncated"):
+        message_content["reasoning"] += (
+            " (open interest truncated to the largest positions)"
+        )
+
+    # Print the reasoning if the flag is set
+    if show_reasoning:
+        show_agent_reasoning(message_content, "Sentiment Analysis Agent")
+
+    # Create the sentiment message
+    message = agent_message(message_content, "sentiment_agent")
+
+    return {
+        "messages": [message],
+        "data": data,
+    }
+
+
+def calculate_sentiment_signal(bullish_signals, bearish_signals):
+    """Derives the sentiment signal from long and short open interest.
+
+    Args:
+        bullish_signals: Long open interest
+        bearish_signals: Short open interest
+
+    Returns:
+        tuple: (signal, confidence) where signal is bullish, bearish or neutral
+        and confidence is the share of the dominant side
+    """
     bull_percentage = bullish_signals / (bullish_signals + bearish_signals)
     bear_percentage = bearish_signals / (bullish_signals + bearish_signals)
 
@@ -48,23 +82,4 @@ def sentiment_agent(state: AgentState):
 
     confidence = max(bull_percentage, bear_percentage)
 
-    message_content = {
-        "signal": overall_signal,
-        "confidence": f"{round(confidence * 100)}%",
-        "reasoning": f"Bullish signals: {bullish_signals}, Bearish signals: {bearish_signals}",
-    }
-
-    # Print the reasoning if the flag is set
-    if show_reasoning:
-        show_agent_reasoning(message_content, "Sentiment Analysis Agent")
-
-    # Create the sentiment message
-    message = HumanMessage(
-        content=json.dumps(message_content),
-        name="sentiment_agent",
-    )
-
-    return {
-        "messages": [message],
-        "data": data,
-    }
+    return overall_signal, confidence
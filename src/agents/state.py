@@ -1,7 +1,9 @@
 from typing import Annotated, Any, Dict, Sequence, TypedDict
 
 import operator
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from tools.json_codec import loads
 
 
 import json
@@ -27,6 +29,44 @@ class AgentState(TypedDict):
     metadata: Annotated[Dict[str, Any], merge_dicts]
 
 
+def agent_message(payload: Dict[str, Any], name: str) -> HumanMessage:
+    """Builds the message carrying an agent's output.
+
+    The content is the JSON text embedded in the portfolio manager prompt, and
+    the payload itself travels in additional_kwargs["payload"] so other agents
+    read it without decoding the text again. Payloads are shared, not copied,
+    and must not be mutated.
+
+    Args:
+        payload (Dict[str, Any]): JSON serializable output of the agent
+        name (str): Name of the agent
+
+    Returns:
+        HumanMessage: Message with both the JSON content and the typed payload
+    """
+    return HumanMessage(
+        content=json.dumps(payload),
+        name=name,
+        additional_kwargs={"payload": payload},
+    )
+
+
+def message_payload(message: BaseMessage) -> Any:
+    """Returns the typed payload of an agent message.
+
+    Messages built without one (e.g. restored from a checkpoint or cache) have
+    their JSON content decoded with the fast JSON backend instead.
+
+    Raises:
+        json.JSONDecodeError: If the message has no payload and its content is
+            not JSON
+    """
+    payload = message.additional_kwargs.get("payload")
+    if payload is None:
+        payload = loads(message.content)
+    return payload
+
+
 def show_agent_reasoning(output, agent_name):
     """Displays the reasoning and output of an agent in a formatted way.
 
@@ -1,15 +1,24 @@
 import math
 from typing import Dict
 
-from langchain_core.messages import HumanMessage
+from agents.feature_cache import cached_feature, feature_cache_scope
+from agents.indicator_kernels import rolling_moments, rolling_zscore
+from agents.state import AgentState, agent_message, show_agent_reasoning
 
-from agents.state import AgentState, show_agent_reasoning
-
-import json
 import pandas as pd
 import numpy as np
 
 
+# Weights of the strategies combined by weighted_signal_combination
+STRATEGY_WEIGHTS = {
+    "trend": 0.25,
+    "mean_reversion": 0.20,
+    "momentum": 0.25,
+    "volatility": 0.15,
+    "stat_arb": 0.15,
+}
+
+
 ##### Technical Analyst #####
 def technical_analyst_agent(state: AgentState):
     """
@@ -19,7 +28,20 @@ def technical_analyst_agent(state: AgentState):
     3. Momentum
     4. Volatility Analysis
     5. Statistical Arbitrage Signals
+
+    Shared building blocks (returns, true range, EMAs, RSI...) are computed
+    once per run through a feature cache.
     """
+    with feature_cache_scope() as cache:
+        output = _technical_analysis(state)
+    if state["metadata"]["show_reasoning"]:
+        stats = cache.stats()
+        print(f"Feature cache: {stats['hits']} hits, {stats['misses']} misses")
+    return output
+
+
+def _technical_analysis(state: AgentState):
+    """Body of technical_analyst_agent, run inside a feature cache scope"""
     show_reasoning = state["metadata"]["show_reasoning"]
     data = state["data"]
     prices_df = data["prices"]
@@ -143,14 +165,6 @@ def technical_analyst_agent(state: AgentState):
     stat_arb_signals = calculate_stat_arb_signals(prices_df)
 
     # Combine all signals using a weighted ensemble approach
-    strategy_weights = {
-        "trend": 0.25,
-        "mean_reversion": 0.20,
-        "momentum": 0.25,
-        "volatility": 0.15,
-        "stat_arb": 0.15,
-    }
-
     combined_signal = weighted_signal_combination(
         {
             "trend": trend_signals,
@@ -159,7 +173,7 @@ def technical_analyst_agent(state: AgentState):
             "volatility": volatility_signals,
             "stat_arb": stat_arb_signals,
         },
-        strategy_weights,
+        STRATEGY_WEIGHTS,
     )
 
     # Generate detailed analysis report
@@ -196,10 +210,7 @@ def technical_analyst_agent(state: AgentState):
     }
 
     # Create the technical analyst message
-    message = HumanMessage(
-        content=json.dumps(analysis_report),
-        name="technical_analyst_agent",
-    )
+    message = agent_message(analysis_report, "technical_analyst_agent")
 
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(analysis_report, "Technical Analyst")
@@ -264,10 +275,8 @@ def calculate_mean_reversion_signals(prices_df):
     """
     Mean reversion strategy using statistical measures and Bollinger Bands
     """
-    # Calculate z-score of price relative to moving average
-    ma_50 = prices_df["close"].rolling(window=50).mean()
-    std_50 = prices_df["close"].rolling(window=50).std()
-    z_score = (prices_df["close"] - ma_50) / std_50
+    # Calculate z-score of the last price relative to its 50 period average
+    z_score = rolling_zscore(prices_df["close"], 50, last_only=True)
 
     # Calculate Bollinger Bands
     bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
@@ -277,18 +286,18 @@ def calculate_mean_reversion_signals(prices_df):
     rsi_28 = calculate_rsi(prices_df, 28)
 
     # Mean reversion signals
-    extreme_z_score = abs(z_score.iloc[-1]) > 2
+    extreme_z_score = abs(z_score) > 2
     price_vs_bb = (prices_df["close"].iloc[-1] - bb_lower.iloc[-1]) / (
         bb_upper.iloc[-1] - bb_lower.iloc[-1]
     )
 
     # Combine signals
-    if z_score.iloc[-1] < -2 and price_vs_bb < 0.2:
+    if z_score < -2 and price_vs_bb < 0.2:
         signal = "bullish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
-    elif z_score.iloc[-1] > 2 and price_vs_bb > 0.8:
+        confidence = min(abs(z_score) / 4, 1.0)
+    elif z_score > 2 and price_vs_bb > 0.8:
         signal = "bearish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
+        confidence = min(abs(z_score) / 4, 1.0)
     else:
         signal = "neutral"
         confidence = 0.5
@@ -297,7 +306,7 @@ def calculate_mean_reversion_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "z_score": float(z_score.iloc[-1]),
+            "z_score": float(z_score),
             "price_vs_bb": float(price_vs_bb),
             "rsi_14": float(rsi_14.iloc[-1]),
             "rsi_28": float(rsi_28.iloc[-1]),
@@ -310,7 +319,7 @@ def calculate_momentum_signals(prices_df):
     Multi-factor momentum strategy
     """
     # Price momentum
-    returns = prices_df["close"].pct_change()
+    returns = calculate_returns(prices_df)
     mom_1m = returns.rolling(21).sum()
     mom_3m = returns.rolling(63).sum()
     mom_6m = returns.rolling(126).sum()
@@ -355,7 +364,7 @@ def calculate_volatility_signals(prices_df):
     Volatility-based trading strategy
     """
     # Calculate various volatility metrics
-    returns = prices_df["close"].pct_change()
+    returns = calculate_returns(prices_df)
 
     # Historical volatility
     hist_vol = returns.rolling(21).std() * math.sqrt(252)
@@ -402,11 +411,10 @@ def calculate_stat_arb_signals(prices_df):
     Statistical arbitrage signals based on price action analysis
     """
     # Calculate price distribution statistics
-    returns = prices_df["close"].pct_change()
+    returns = calculate_returns(prices_df)
 
-    # Skewness and kurtosis
-    skew = returns.rolling(63).skew()
-    kurt = returns.rolling(63).kurt()
+    # Skewness and kurtosis of the last 63 returns
+    _, _, skew, kurt = rolling_moments(returns, 63, last_only=True)
 
     # Test for mean reversion using Hurst exponent
     hurst = calculate_hurst_exponent(prices_df["close"])
@@ -415,10 +423,10 @@ def calculate_stat_arb_signals(prices_df):
     # (would include correlation with related securities in real implementation)
 
     # Generate signal based on statistical properties
-    if hurst < 0.4 and skew.iloc[-1] > 1:
+    if hurst < 0.4 and skew > 1:
         signal = "bullish"
         confidence = (0.5 - hurst) * 2
-    elif hurst < 0.4 and skew.iloc[-1] < -1:
+    elif hurst < 0.4 and skew < -1:
         signal = "bearish"
         confidence = (0.5 - hurst) * 2
     else:
@@ -430,8 +438,8 @@ def calculate_stat_arb_signals(prices_df):
         "confidence": confidence,
         "metrics": {
             "hurst_exponent": float(hurst),
-            "skewness": float(skew.iloc[-1]),
-            "kurtosis": float(kurt.iloc[-1]),
+            "skewness": float(skew),
+            "kurtosis": float(kurt),
         },
     }
 
@@ -471,6 +479,107 @@ def weighted_signal_combination(signals, weights):
     return {"signal": signal, "confidence": abs(final_score)}
 
 
+def calculate_signal_frame(
+    prices_df: pd.DataFrame, hurst_window: int = 720
+) -> pd.DataFrame:
+    """
+    Vectorized version of the strategy ensemble for every row of prices_df.
+
+    Each row holds the signals technical_analyst_agent would produce if its
+    price window ended at that row, so a backtest can compute all features in
+    one pass and then read rows instead of re-running the agent per step.
+    Signals are encoded as 1 (bullish), 0 (neutral) and -1 (bearish).
+
+    Args:
+        prices_df: DataFrame with OHLCV data covering the whole backtest
+        hurst_window: Number of bars used for the rolling Hurst exponent
+
+    Returns:
+        pd.DataFrame: Per-strategy "<name>_signal"/"<name>_confidence" columns,
+        the combined "signal"/"confidence" and the close price
+    """
+    close = prices_df["close"]
+    returns = calculate_returns(prices_df)
+    frame = pd.DataFrame({"close": close}, index=prices_df.index)
+
+    def add_strategy(name, bullish, bearish, confidence):
+        frame[f"{name}_signal"] = np.select([bullish, bearish], [1, -1], 0)
+        frame[f"{name}_confidence"] = np.where(bullish | bearish, confidence, 0.5)
+
+    # 1. Trend following
+    ema_8 = calculate_ema(prices_df, 8)
+    ema_21 = calculate_ema(prices_df, 21)
+    ema_55 = calculate_ema(prices_df, 55)
+    adx = calculate_adx(prices_df, 14)["adx"]
+    short_trend = ema_8 > ema_21
+    medium_trend = ema_21 > ema_55
+    add_strategy(
+        "trend", short_trend & medium_trend, ~short_trend & ~medium_trend, adx / 100.0
+    )
+
+    # 2. Mean reversion
+    z_score = pd.Series(rolling_zscore(close, 50), index=close.index)
+    bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
+    price_vs_bb = (close - bb_lower) / (bb_upper - bb_lower)
+    add_strategy(
+        "mean_reversion",
+        (z_score < -2) & (price_vs_bb < 0.2),
+        (z_score > 2) & (price_vs_bb > 0.8),
+        np.minimum(z_score.abs() / 4, 1.0),
+    )
+
+    # 3. Momentum
+    momentum_score = (
+        0.4 * returns.rolling(21).sum()
+        + 0.3 * returns.rolling(63).sum()
+        + 0.3 * returns.rolling(126).sum()
+    )
+    volume_confirmation = prices_df["volume"] / prices_df["volume"].rolling(
+        21
+    ).mean() > 1.0
+    add_strategy(
+        "momentum",
+        (momentum_score > 0.05) & volume_confirmation,
+        (momentum_score < -0.05) & volume_confirmation,
+        np.minimum(momentum_score.abs() * 5, 1.0),
+    )
+
+    # 4. Volatility
+    hist_vol = returns.rolling(21).std() * math.sqrt(252)
+    vol_ma = hist_vol.rolling(63).mean()
+    vol_regime = hist_vol / vol_ma
+    vol_z = (hist_vol - vol_ma) / hist_vol.rolling(63).std()
+    add_strategy(
+        "volatility",
+        (vol_regime < 0.8) & (vol_z < -1),
+        (vol_regime > 1.2) & (vol_z > 1),
+        np.minimum(vol_z.abs() / 3, 1.0),
+    )
+
+    # 5. Statistical arbitrage
+    skew = pd.Series(rolling_moments(returns, 63)[2], index=returns.index)
+    hurst = calculate_rolling_hurst(close, hurst_window)
+    add_strategy(
+        "stat_arb",
+        (hurst < 0.4) & (skew > 1),
+        (hurst < 0.4) & (skew < -1),
+        (0.5 - hurst) * 2,
+    )
+
+    # Weighted ensemble, same rules as weighted_signal_combination
+    weighted_sum = 0
+    total_confidence = 0
+    for strategy, weight in STRATEGY_WEIGHTS.items():
+        confidence = frame[f"{strategy}_confidence"]
+        weighted_sum = weighted_sum + frame[f"{strategy}_signal"] * weight * confidence
+        total_confidence = total_confidence + weight * confidence
+    final_score = (weighted_sum / total_confidence).where(total_confidence > 0, 0)
+    frame["signal"] = np.select([final_score > 0.2, final_score < -0.2], [1, -1], 0)
+    frame["confidence"] = final_score.abs()
+
+    return frame
+
+
 def normalize_pandas(obj):
     """Convert pandas Series/DataFrames to primitive Python types"""
     if isinstance(obj, pd.Series):
@@ -484,6 +593,7 @@ def normalize_pandas(obj):
     return obj
 
 
+@cached_feature("macd")
 def calculate_macd(prices_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
     """
     Calculate Moving Average Convergence Divergence (MACD) indicator.
@@ -496,13 +606,14 @@ def calculate_macd(prices_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
             - MACD line: Difference between 12-period and 26-period EMAs
             - Signal line: 9-period EMA of MACD line
     """
-    ema_12 = prices_df["close"].ewm(span=12, adjust=False).mean()
-    ema_26 = prices_df["close"].ewm(span=26, adjust=False).mean()
+    ema_12 = calculate_ema(prices_df, 12)
+    ema_26 = calculate_ema(prices_df, 26)
     macd_line = ema_12 - ema_26
     signal_line = macd_line.ewm(span=9, adjust=False).mean()
     return macd_line, signal_line
 
 
+@cached_feature("rsi")
 def calculate_rsi(prices_df: pd.DataFrame, period: int = 14) -> pd.Series:
     """
     Calculate Relative Strength Index (RSI) indicator.
@@ -526,6 +637,7 @@ def calculate_rsi(prices_df: pd.DataFrame, period: int = 14) -> pd.Series:
     return rsi
 
 
+@cached_feature("bollinger_bands")
 def calculate_bollinger_bands(
     prices_df: pd.DataFrame, window: int = 20
 ) -> tuple[pd.Series, pd.Series]:
@@ -548,6 +660,7 @@ def calculate_bollinger_bands(
     return upper_band, lower_band
 
 
+@cached_feature("ema")
 def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
     """
     Calculate Exponential Moving Average
@@ -562,47 +675,46 @@ def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
     return df["close"].ewm(span=window, adjust=False).mean()
 
 
+@cached_feature("adx")
 def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     """
     Calculate Average Directional Index (ADX)
 
     Args:
-        df: DataFrame with OHLC data
+        df: DataFrame or PriceFrame with OHLC data, left unmodified
         period: Period for calculations
 
     Returns:
         DataFrame with ADX values
     """
+    high, low = df["high"], df["low"]
+
     # Calculate True Range
-    df["high_low"] = df["high"] - df["low"]
-    df["high_close"] = abs(df["high"] - df["close"].shift())
-    df["low_close"] = abs(df["low"] - df["close"].shift())
-    df["tr"] = df[["high_low", "high_close", "low_close"]].max(axis=1)
+    true_range = calculate_true_range(df)
 
     # Calculate Directional Movement
-    df["up_move"] = df["high"] - df["high"].shift()
-    df["down_move"] = df["low"].shift() - df["low"]
+    up_move = high - high.shift()
+    down_move = low.shift() - low
 
-    df["plus_dm"] = np.where(
-        (df["up_move"] > df["down_move"]) & (df["up_move"] > 0), df["up_move"], 0
+    plus_dm = pd.Series(
+        np.where((up_move > down_move) & (up_move > 0), up_move, 0), index=df.index
     )
-    df["minus_dm"] = np.where(
-        (df["down_move"] > df["up_move"]) & (df["down_move"] > 0), df["down_move"], 0
+    minus_dm = pd.Series(
+        np.where((down_move > up_move) & (down_move > 0), down_move, 0),
+        index=df.index,
     )
 
     # Calculate ADX
-    df["+di"] = 100 * (
-        df["plus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean()
-    )
-    df["-di"] = 100 * (
-        df["minus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean()
-    )
-    df["dx"] = 100 * abs(df["+di"] - df["-di"]) / (df["+di"] + df["-di"])
-    df["adx"] = df["dx"].ewm(span=period).mean()
+    smoothed_tr = true_range.ewm(span=period).mean()
+    plus_di = 100 * (plus_dm.ewm(span=period).mean() / smoothed_tr)
+    minus_di = 100 * (minus_dm.ewm(span=period).mean() / smoothed_tr)
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    adx = dx.ewm(span=period).mean()
 
-    return df[["adx", "+di", "-di"]]
+    return pd.DataFrame({"adx": adx, "+di": plus_di, "-di": minus_di})
 
 
+@cached_feature("ichimoku")
 def calculate_ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
     """
     Calculate Ichimoku Cloud indicators
@@ -643,6 +755,7 @@ def calculate_ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
     }
 
 
+@cached_feature("atr")
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """
     Calculate Average True Range
@@ -654,14 +767,41 @@ def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     Returns:
         pd.Series: ATR values
     """
+    return calculate_true_range(df).rolling(period).mean()
+
+
+@cached_feature("true_range")
+def calculate_true_range(df: pd.DataFrame) -> pd.Series:
+    """
+    Calculate True Range, shared by calculate_adx and calculate_atr
+
+    Args:
+        df: DataFrame with OHLC data
+
+    Returns:
+        pd.Series: True range values
+    """
     high_low = df["high"] - df["low"]
     high_close = abs(df["high"] - df["close"].shift())
     low_close = abs(df["low"] - df["close"].shift())
 
     ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
+    return ranges.max(axis=1)
+
+
+@cached_feature("returns")
+def calculate_returns(df: pd.DataFrame) -> pd.Series:
+    """
+    Calculate close-to-close returns, shared by the momentum, volatility and
+    statistical arbitrage strategies
 
-    return true_range.rolling(period).mean()
+    Args:
+        df: DataFrame with price data
+
+    Returns:
+        pd.Series: Percentage change of the close price
+    """
+    return df["close"].pct_change()
 
 
 def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> float:
@@ -671,6 +811,9 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
     H = 0.5: Random walk
     H > 0.5: Trending series
 
+    Differences are taken by position on the raw values, for all lags in one
+    strided pass.
+
     Args:
         price_series: Array-like price data
         max_lag: Maximum lag for R/S calculation
@@ -678,22 +821,74 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
     Returns:
         float: Hurst exponent
     """
-    lags = range(2, max_lag)
+    values = np.asarray(price_series, dtype=np.float64)
+    lags = np.arange(2, max_lag)
+    if len(values) <= max_lag:
+        # Return 0.5 (random walk) if there is not enough data
+        return 0.5
+
+    # Row i holds values[i:i + max_lag], padded with NaN past the end, so
+    # column lag minus column 0 is every lag difference starting at i
+    padded = np.concatenate([values, np.full(max_lag - 1, np.nan)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, max_lag)
+    differences = windows[:, lags] - windows[:, :1]
     # Add small epsilon to avoid log(0)
-    tau = [
-        max(1e-8, np.sqrt(np.std(np.subtract(price_series[lag:], price_series[:-lag]))))
-        for lag in lags
-    ]
-
-    # Return the Hurst exponent from linear fit
-    try:
-        reg = np.polyfit(np.log(lags), np.log(tau), 1)
-        return reg[0]  # Hurst exponent is the slope
-    except (ValueError, RuntimeWarning):
-        # Return 0.5 (random walk) if calculation fails
+    tau = np.maximum(1e-8, np.sqrt(np.nanstd(differences, axis=0)))
+
+    if not np.all(np.isfinite(tau)):
         return 0.5
+    return float(_hurst_slope(np.log(tau), lags))
+
 
+def calculate_rolling_hurst(
+    price_series: pd.Series, window: int, max_lag: int = 20
+) -> pd.Series:
+    """
+    Hurst exponent of every trailing window of a price series.
+
+    Equivalent to price_series.rolling(window).apply(calculate_hurst_exponent)
+    but computed with one rolling standard deviation per lag instead of
+    re-fitting every window, i.e. O(n * max_lag) instead of
+    O(n * max_lag * window).
+
+    Args:
+        price_series: Price data
+        window: Number of bars per window
+        max_lag: Maximum lag for R/S calculation
 
+    Returns:
+        pd.Series: Hurst exponent of the window ending at each bar, NaN for
+        the first window - 1 bars
+    """
+    values = np.asarray(price_series, dtype=np.float64)
+    index = price_series.index if isinstance(price_series, pd.Series) else None
+    lags = np.arange(2, max_lag)
+    n = len(values)
+    if window <= max_lag:
+        raise ValueError(f"window must be larger than max_lag ({max_lag})")
+
+    # log_tau[t, k]: log tau of lag lags[k] over the window ending at bar t
+    log_tau = np.full((n, len(lags)), np.nan)
+    for k, lag in enumerate(lags):
+        # Differences starting at i, for the window ending at t, run over
+        # i in [t - window + 1, t - lag]: a rolling window of window - lag
+        # differences ending lag bars before t
+        differences = pd.Series(values[lag:] - values[:-lag])
+        std = differences.rolling(window - lag).std(ddof=0).to_numpy()
+        log_tau[lag:, k] = np.log(np.maximum(1e-8, np.sqrt(std)))
+
+    return pd.Series(_hurst_slope(log_tau, lags), index=index, name="hurst")
+
+
+def _hurst_slope(log_tau: np.ndarray, lags: np.ndarray):
+    """Least squares slope of log_tau against log(lags), along the last axis."""
+    x = np.log(lags)
+    x = x - x.mean()
+    y = log_tau - log_tau.mean(axis=-1, keepdims=True)
+    return y @ x / (x @ x)
+
+
+@cached_feature("obv")
 def calculate_obv(prices_df: pd.DataFrame) -> pd.Series:
     """
     Calculate On-Balance Volume (OBV) indicator.
@@ -707,13 +902,37 @@ def calculate_obv(prices_df: pd.DataFrame) -> pd.Series:
     Returns:
         pd.Series: Cumulative OBV values
     """
-    obv = [0]
-    for i in range(1, len(prices_df)):
-        if prices_df["close"].iloc[i] > prices_df["close"].iloc[i - 1]:
-            obv.append(obv[-1] + prices_df["volume"].iloc[i])
-        elif prices_df["close"].iloc[i] < prices_df["close"].iloc[i - 1]:
-            obv.append(obv[-1] - prices_df["volume"].iloc[i])
-        else:
-            obv.append(obv[-1])
-    prices_df["OBV"] = obv
-    return prices_df["OBV"]
+    close = prices_df["close"].to_numpy(dtype=float)
+    volume = prices_df["volume"].to_numpy(dtype=float)
+    direction = np.zeros(len(close))
+    direction[1:] = np.sign(np.nan_to_num(np.diff(close)))
+    return pd.Series(np.cumsum(direction * volume), index=prices_df.index, name="OBV")
+
+
+def extend_obv(obv: pd.Series, prices_df: pd.DataFrame) -> pd.Series:
+    """
+    Extend a previously computed OBV series with the bars appended since.
+
+    Only the last len(prices_df) - len(obv) bars are processed, so history is
+    never recomputed.
+
+    Args:
+        obv: OBV computed by calculate_obv on the first len(obv) rows of prices_df
+        prices_df: DataFrame containing the same rows plus the new bars
+
+    Returns:
+        pd.Series: OBV values for every row of prices_df
+    """
+    n_old = len(obv)
+    if n_old == 0:
+        return calculate_obv(prices_df)
+    if n_old >= len(prices_df):
+        return obv
+
+    close = prices_df["close"].to_numpy(dtype=float)[n_old - 1 :]
+    volume = prices_df["volume"].to_numpy(dtype=float)[n_old:]
+    direction = np.sign(np.nan_to_num(np.diff(close)))
+    new_obv = obv.iloc[-1] + np.cumsum(direction * volume)
+    return pd.concat(
+        [obv, pd.Series(new_obv, index=prices_df.index[n_old:], name=obv.name)]
+    )
@@ -1,14 +1,38 @@
+import json
+import os
 from datetime import datetime, timedelta
+from functools import partial
 
 import matplotlib.pyplot as plt
 import pandas as pd
+from langchain_core.messages import BaseMessage
 
-from main import run_hedge_fund
-from tools.api import get_price_API_HYPERLIQUID
+from agents.portfolio_manager import calculate_rule_based_decision
+from agents.risk_manager import calculate_max_position_margin, calculate_risk_frame
+from agents.sentiment import calculate_sentiment_signal
+from agents.state import message_payload
+from agents.technicals import calculate_signal_frame
+from main import DECISION_MODES, DEFAULT_PORTFOLIO, run_hedge_fund
+from tools.api import get_LS_OI_Copin, get_price_API_HYPERLIQUID
+from tools.candle_store import INTERVAL_MS
+from tools.json_codec import loads
+from tools.price_frame import PriceFrame, slice_time, time_bounds
+from tools.resample import DEFAULT_INTERVAL, bars_per_day
 
 
 class Backtester:
-    def __init__(self, agent, crypto, start_date, end_date, initial_capital):
+    def __init__(
+        self,
+        agent,
+        crypto,
+        start_date,
+        end_date,
+        initial_capital,
+        leverage=DEFAULT_PORTFOLIO["leverage"],
+        risk=DEFAULT_PORTFOLIO["risk"],
+        lookback_days=30,
+        interval=DEFAULT_INTERVAL,
+    ):
         """Initialize the backtester with trading parameters.
 
         Args:
@@ -17,14 +41,23 @@ class Backtester:
             start_date: Start date for the backtest (YYYY-MM-DD)
             end_date: End date for the backtest (YYYY-MM-DD)
             initial_capital: Initial capital to start trading with
+            leverage: Leverage used by the risk manager
+            risk: Proportion of the total balance that can be lost per trade
+            lookback_days: Days of price history the agent sees for each decision
+            interval: Candle interval of the price history, e.g. "1d" for
+                daily bars matching the daily decision step
         """
         self.agent = agent
         self.crypto = crypto
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
+        self.lookback_days = lookback_days
+        self.interval = interval
         self.portfolio = {
             "cash": initial_capital,
+            "leverage": leverage,
+            "risk": risk,
             "collateral_long": 0,
             "collateral_short": 0,
             "price_collateral": 0,
@@ -35,7 +68,8 @@ class Backtester:
         """Parse the trading action from the agent's output.
 
         Args:
-            agent_output: JSON string containing trading decision from agent
+            agent_output: Final message of the agent, whose typed payload is
+                read directly, or JSON string containing its trading decision
 
         Returns:
             tuple: (action, quantity) where action is the trading action
@@ -43,11 +77,14 @@ class Backtester:
         """
         try:
             # Expect JSON output from agent
-            import json
-
-            decision = json.loads(agent_output)
+            if isinstance(agent_output, BaseMessage):
+                decision = message_payload(agent_output)
+            else:
+                decision = loads(agent_output)
             return decision["action"], decision["quantity"]
         except (json.JSONDecodeError, KeyError, TypeError) as e:
+            if isinstance(agent_output, BaseMessage):
+                agent_output = agent_output.content
             print(f"Error parsing action: {agent_output}, Error: {e}")
             return "hold", 0
 
@@ -98,13 +135,37 @@ class Backtester:
             self.portfolio["collateral_long"] = 0
         pass
 
+    def load_price_history(self):
+        """Load the prices of the whole backtest, lookback window included.
+
+        Returns:
+            pandas.DataFrame: Prices indexed by UTC candle open time, or None
+            if they cannot be loaded
+        """
+        history_start = (
+            pd.Timestamp(self.start_date) - timedelta(days=self.lookback_days)
+        ).strftime("%Y-%m-%d")
+        prices = get_price_API_HYPERLIQUID(
+            self.crypto, history_start, self.end_date, self.interval
+        )
+        if isinstance(prices, str):
+            print(prices)
+            return None
+        return prices
+
     def run_backtest(self):
         """Run the backtest simulation over the specified date range.
 
         Simulates trading day by day, executing the agent's trading decisions
-        and tracking portfolio value.
+        and tracking portfolio value. Prices are loaded once and each day's
+        lookback window is sliced out of them by time.
         """
         dates = pd.date_range(self.start_date, self.end_date, freq="D")
+        history = self.load_price_history()
+        if history is None:
+            return
+        # Windows of a PriceFrame are views, no copy is made per day
+        history = PriceFrame.from_frame(history)
 
         print("\nStarting backtest...")
         print(
@@ -114,13 +175,15 @@ class Backtester:
         print("-" * 135)
 
         for current_date in dates:
-            lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
+            lookback_start = (
+                current_date - timedelta(days=self.lookback_days)
+            ).strftime("%Y-%m-%d")
             current_date_str = current_date.strftime("%Y-%m-%d")
 
-            df = get_price_API_HYPERLIQUID(
-                self.crypto, lookback_start, current_date_str
-            )
-            current_price = df.iloc[-1]["close"]
+            window = slice_time(history, lookback_start, current_date_str)
+            if window.empty:
+                continue
+            current_price = float(window["close"].iloc[-1])
 
             self.sell_collateral(current_price)
 
@@ -129,6 +192,9 @@ class Backtester:
                 start_date=lookback_start,
                 end_date=current_date_str,
                 portfolio=self.portfolio,
+                interval=self.interval,
+                prices=window,
+                return_message=True,
             )
 
             action, quantity = self.parse_action(agent_output)
@@ -136,30 +202,122 @@ class Backtester:
             # Execute the trade with validation
             executed_quantity = self.execute_trade(action, quantity, current_price)
 
-            # Update total portfolio value
-            if self.portfolio["collateral_long"] > 0:
-                total_value = (
-                    self.portfolio["cash"]
-                    + self.portfolio["collateral_long"] * current_price
-                )
-            elif self.portfolio["collateral_short"] > 0:
-                total_value = self.portfolio["cash"] + self.portfolio[
-                    "collateral_short"
-                ] * (2 * self.portfolio["price_collateral"] - current_price)
-            else:
-                total_value = self.portfolio["cash"]
-            self.portfolio["portfolio_value"] = total_value
+            self.record_day(current_date, action, executed_quantity, current_price)
 
-            # Log the current state with executed quantity
-            print(
-                f"{current_date.strftime('%Y-%m-%d'):<12} {self.crypto:<10} {action:<10} {executed_quantity:>8} {current_price:>8.2f} "
-                f"{self.portfolio['cash']:>12.2f} {self.portfolio['collateral_long']:>25} {self.portfolio['collateral_short']:>25} {total_value:>15.2f}"
-            )
+    def run_fast_backtest(self):
+        """Run the backtest in fast replay mode.
+
+        Loads the full price history once, computes every technical and risk
+        feature for all timestamps as vectorized columns and then steps through
+        the days reading precomputed rows. No agent pipeline or LLM is invoked;
+        decisions come from replay_decision. Open interest has no history, so
+        the current long/short snapshot is fetched once, as the regular
+        backtest effectively does every day.
+        """
+        dates = pd.date_range(self.start_date, self.end_date, freq="D")
+        prices = self.load_price_history()
+        if prices is None:
+            return
+        # Features are computed in float64 whatever the stored price dtype
+        prices = prices.astype("float64", copy=False)
+
+        window_bars = self.lookback_days * bars_per_day(self.interval)
+        features = calculate_signal_frame(prices, hurst_window=window_bars).join(
+            calculate_risk_frame(prices, window_bars=window_bars)
+        )
+
+        insider_trades = get_LS_OI_Copin(pair=self.crypto)
+        if isinstance(insider_trades, str):
+            sentiment_signal = ("neutral", 0.5)
+        else:
+            sentiment_signal = calculate_sentiment_signal(*insider_trades)
+
+        print("\nStarting fast backtest...")
+        print(
+            f"{'Date':<12} {'Crypto':<10} {'Action':<10} {'Quantity':>8} {'Price': >8} {'Cash':>12} {'Collateral long':>25} {'Collateral short':>25} {'Total Value':>15}"
+        )
+
+        print("-" * 135)
+
+        for current_date in dates:
+            # Last candle of the window ending at current_date
+            position = time_bounds(features.index, end=current_date)[1] - 1
+            if position < 0:
+                continue
+            row = features.iloc[position]
+            current_price = float(row["close"])
+
+            self.sell_collateral(current_price)
+
+            action, quantity = self.replay_decision(row, sentiment_signal)
+
+            executed_quantity = self.execute_trade(action, quantity, current_price)
+
+            self.record_day(current_date, action, executed_quantity, current_price)
+
+    def replay_decision(self, row, sentiment_signal):
+        """Decide a trade from a precomputed feature row in fast replay mode.
+
+        Applies the rule-based portfolio decision (see
+        calculate_rule_based_decision) to the combined technical signal, the
+        sentiment signal and the risk manager's max_position_margin: weak
+        scores hold, others size the position by the score.
+
+        Args:
+            row: Row of the feature frame built by run_fast_backtest
+            sentiment_signal: (signal, confidence) from the open interest snapshot
+
+        Returns:
+            tuple: (action, quantity)
+        """
+        max_position_margin = calculate_max_position_margin(
+            self.portfolio["cash"],
+            self.portfolio["risk"],
+            self.portfolio["leverage"],
+            row["volatility"],
+        )
+        technical_signal = {1: "bullish", -1: "bearish"}.get(row["signal"], "neutral")
+        action, quantity, _ = calculate_rule_based_decision(
+            technical_signal,
+            row["confidence"],
+            *sentiment_signal,
+            max_position_margin,
+        )
+        return action, quantity
 
-            # Record the portfolio value
-            self.portfolio_values.append(
-                {"Date": current_date, "Portfolio Value": total_value}
+    def record_day(self, current_date, action, executed_quantity, current_price):
+        """Update the portfolio value for the day, log it and record it.
+
+        Args:
+            current_date: Simulated date
+            action: Action taken for the day
+            executed_quantity: Quantity actually executed
+            current_price: Price of the asset at the end of the day
+        """
+        # Update total portfolio value
+        if self.portfolio["collateral_long"] > 0:
+            total_value = (
+                self.portfolio["cash"]
+                + self.portfolio["collateral_long"] * current_price
             )
+        elif self.portfolio["collateral_short"] > 0:
+            total_value = self.portfolio["cash"] + self.portfolio[
+                "collateral_short"
+            ] * (2 * self.portfolio["price_collateral"] - current_price)
+        else:
+            total_value = self.portfolio["cash"]
+        self.portfolio["portfolio_value"] = total_value
+
+        # Log the current state with executed quantity
+        print(
+            f"{current_date.strftime('%Y-%m-%d'):<12} {self.crypto:<10} {action:<10} {executed_quantity:>8} {current_price:>8.2f} "
+            f"{self.portfolio['cash']:>12.2f} {self.portfolio['collateral_long']:>25} {self.portfolio['collateral_short']:>25} {total_value:>15.2f}"
+        )
+
+        # Record the portfolio value
+        self.portfolio_values.append(
+            {"Date": current_date, "Portfolio Value": total_value}
+        )
 
     def analyze_performance(self):
         """Analyze and display the backtest performance metrics.
@@ -229,24 +387,53 @@ if __name__ == "__main__":
         default=(datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
         help="Start date in YYYY-MM-DD format",
     )
+    parser.add_argument(
+        "--interval",
+        choices=list(INTERVAL_MS),
+        default=DEFAULT_INTERVAL,
+        help="Candle interval of the price history, e.g. 1d for daily bars. Default: 1h",
+    )
     parser.add_argument(
         "--initial-capital",
         type=float,
         default=100000,
         help="Initial capital amount (default: 100000)",
     )
+    parser.add_argument(
+        "--replay-llm",
+        action="store_true",
+        help="Only use cached LLM responses (no LLM calls), days without one hold",
+    )
+    parser.add_argument(
+        "--decision",
+        choices=DECISION_MODES,
+        default="llm",
+        help="Daily decision: llm (portfolio manager) or rules (weighted signals, no LLM call). Default: llm",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Fast replay: compute all signals in one pass instead of running the agents each day",
+    )
 
     args = parser.parse_args()
 
+    if args.replay_llm:
+        os.environ["LLM_CACHE_MODE"] = "replay"
+
     # Create an instance of Backtester
     backtester = Backtester(
-        agent=run_hedge_fund,
+        agent=partial(run_hedge_fund, decision_mode=args.decision),
         crypto=args.crypto,
         start_date=args.start_date,
         end_date=args.end_date,
         initial_capital=args.initial_capital,
+        interval=args.interval,
     )
 
     # Run the backtesting process
-    backtester.run_backtest()
+    if args.fast:
+        backtester.run_fast_backtest()
+    else:
+        backtester.run_backtest()
     performance_df = backtester.analyze_performance()
@@ -1,4 +1,8 @@
 import os
+import threading
+
+import httpx
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from langchain_openai.chat_models import ChatOpenAI, AzureChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
@@ -7,7 +11,52 @@ from dotenv import load_dotenv
 dotenv_path = os.path.join(os.path.dirname(__file__), "../../.env")
 load_dotenv(dotenv_path)
 
-def get_llm(provider="openai", temperature=0.3, model="gpt-4"):
+# Process-wide LLM clients, keyed by (provider, model, temperature)
+_llms = {}
+_llms_lock = threading.Lock()
+
+# Keep-alive pool shared by the sync OpenAI, Azure and Groq clients. Async
+# clients keep their own pools since those are bound to an event loop.
+_http_client = None
+
+# One request budget per provider, shared by all of its models
+_rate_limiters = {}
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.Client(
+            timeout=float(os.environ.get("LLM_HTTP_TIMEOUT", 60)),
+            limits=httpx.Limits(
+                max_connections=int(os.environ.get("LLM_HTTP_POOL_SIZE", 16)),
+                max_keepalive_connections=int(os.environ.get("LLM_HTTP_POOL_SIZE", 16)),
+            ),
+        )
+    return _http_client
+
+
+def _get_rate_limiter(provider: str):
+    """
+    Return the rate limiter of a provider, or None if rate limiting is off.
+
+    Configured through the environment:
+        - LLM_REQUESTS_PER_SECOND: Sustained request rate, unset or 0 to disable
+        - LLM_MAX_BURST: Requests that may be sent at once after an idle period (default: 1)
+    """
+    requests_per_second = float(os.environ.get("LLM_REQUESTS_PER_SECOND", 0))
+    if requests_per_second <= 0:
+        return None
+    if provider not in _rate_limiters:
+        _rate_limiters[provider] = InMemoryRateLimiter(
+            requests_per_second=requests_per_second,
+            check_every_n_seconds=min(0.1, 1 / requests_per_second),
+            max_bucket_size=float(os.environ.get("LLM_MAX_BURST", 1)),
+        )
+    return _rate_limiters[provider]
+
+
+def create_llm(provider="openai", temperature=0.3, model="gpt-4"):
     """
     Factory function to create LLM instances based on provider
 
@@ -22,23 +71,60 @@ def get_llm(provider="openai", temperature=0.3, model="gpt-4"):
             azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-            temperature=temperature
+            temperature=temperature,
+            http_client=_get_http_client(),
+            rate_limiter=_get_rate_limiter(provider),
         )
     elif provider == "groq":
         return ChatGroq(
             api_key=os.getenv("GROQ_API_KEY"),
             model_name=os.getenv("GROQ_MODEL_NAME"),
             temperature=temperature,
+            http_client=_get_http_client(),
+            rate_limiter=_get_rate_limiter(provider),
         )
     elif provider == "gemini":
         return ChatGoogleGenerativeAI(
             model=os.getenv("GOOGLE_MODEL_NAME"),
             google_api_key=os.getenv("GOOGLE_API_KEY"),
             temperature=temperature,
+            rate_limiter=_get_rate_limiter(provider),
         )
     else:  # default to OpenAI
         return ChatOpenAI(
             openai_api_key=os.getenv("OPENAI_API_KEY"),
             temperature=temperature,
-            model=model
+            model=model,
+            http_client=_get_http_client(),
+            rate_limiter=_get_rate_limiter(provider),
         )
+
+
+def get_llm(provider="openai", temperature=0.3, model="gpt-4"):
+    """
+    Return the shared LLM instance for a provider, model and temperature.
+
+    The client is created on first use and reused by every later call, so
+    repeated decisions keep their HTTP connections alive.
+
+    Args:
+        provider (str): "openai", "azure", "groq", or "gemini"
+        temperature (float): Model temperature
+        model (str): Model name/deployment
+    """
+    key = (provider, model, temperature)
+    with _llms_lock:
+        if key not in _llms:
+            _llms[key] = create_llm(provider, temperature, model)
+        return _llms[key]
+
+
+def clear_llms() -> None:
+    """Drop every cached LLM instance and rate limiter and close the shared HTTP pool."""
+    global _http_client
+    with _llms_lock:
+        _llms.clear()
+        _rate_limiters.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
@@ -1,13 +1,31 @@
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
+import asyncio
 import os
-from agents.market_data import market_data_agent, check_data_valid
-from agents.portfolio_manager import portfolio_management_agent
+from agents.market_data import (
+    amarket_data_agent,
+    aload_market_data,
+    load_market_data,
+    market_data_agent,
+)
+from agents.portfolio_manager import (
+    adecide_portfolio_batch,
+    aportfolio_management_agent,
+    decide_portfolio_batch,
+    portfolio_management_agent,
+    render_decision_markdown,
+    rule_based_portfolio_agent,
+)
 from agents.technicals import technical_analyst_agent
 from agents.risk_manager import risk_management_agent
 from agents.sentiment import sentiment_agent
 from agents.state import AgentState
+from tools.candle_store import INTERVAL_MS
+from tools.http_client import aclose_sessions
+from tools.resample import DEFAULT_INTERVAL
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 def get_model_name(provider):
@@ -81,18 +99,28 @@ def select_llm_provider():
         return provider
 
 ##### Run the AIBrokers #####
-def run_hedge_fund(
+DECISION_MODES = ("llm", "rules")
+
+
+def build_initial_state(
     crypto: str,
-    start_date: str,
-    end_date: str,
     portfolio: dict,
+    market_data: dict,
     show_reasoning: bool = False,
-) -> str:
-    """Run the AI-powered hedge fund trading system."""
-    if not check_data_valid(crypto, start_date, end_date):
-        return "Cannot Run AI - Invalid Data"
+    decision_mode: str = "llm",
+    stream: bool = False,
+    on_decision=None,
+) -> dict:
+    """Build the initial graph state for one crypto from its loaded market data.
+
+    decision_mode selects the final decision node: "llm" for the portfolio
+    manager, "rules" for the deterministic rule-based decision.
 
-    initial_state = {
+    stream prints the portfolio manager's output as it is generated, and
+    on_decision(crypto, action, quantity) is called as soon as the action and
+    quantity are known, before the reasoning has finished streaming.
+    """
+    return {
         "messages": [
             HumanMessage(
                 content="Make a trading decision based on the provided data.",
@@ -101,40 +129,297 @@ def run_hedge_fund(
         "data": {
             "crypto": crypto,
             "portfolio": portfolio,
-            "start_date": start_date,
-            "end_date": end_date,
             "analyst_signals": {},
+            **market_data,
         },
         "metadata": {
             "show_reasoning": show_reasoning,
+            "decision_mode": decision_mode,
+            "stream": stream,
+            "on_decision": on_decision,
         },
     }
 
+
+def run_hedge_fund(
+    crypto: str,
+    start_date: str,
+    end_date: str,
+    portfolio: dict,
+    show_reasoning: bool = False,
+    decision_mode: str = "llm",
+    stream: bool = False,
+    on_decision=None,
+    interval: str = DEFAULT_INTERVAL,
+    prices=None,
+    return_message: bool = False,
+):
+    """Run the AI-powered hedge fund trading system.
+
+    See build_initial_state for decision_mode, stream and on_decision.
+    interval is the candle interval of the analysed prices, and prices an
+    optional price frame already loaded for the date range.
+
+    Returns the decision content, or with return_message the final message,
+    whose additional_kwargs["payload"] holds JSON decisions already decoded.
+    Errors are returned as strings.
+    """
+    market_data = load_market_data(crypto, start_date, end_date, interval, prices)
+    if market_data is None:
+        return "Cannot Run AI - Invalid Data"
+
+    initial_state = build_initial_state(
+        crypto,
+        portfolio,
+        market_data,
+        show_reasoning,
+        decision_mode,
+        stream,
+        on_decision,
+    )
+
     try:
         final_state = APP.invoke(initial_state)
-        return final_state["messages"][-1].content
+        message = final_state["messages"][-1]
+        return message if return_message else message.content
+    except Exception as e:
+        return f"Error running AI: {str(e)}"
+
+
+def run_hedge_fund_batch(
+    cryptos: list[str],
+    start_date: str,
+    end_date: str,
+    portfolio: dict,
+    show_reasoning: bool = False,
+    max_workers: int = 8,
+    llm_max_concurrency: int = None,
+    decision_mode: str = "llm",
+    interval: str = DEFAULT_INTERVAL,
+) -> dict[str, str]:
+    """Run the AI-powered hedge fund trading system for several cryptos at once.
+
+    Market data for all cryptos is fetched concurrently, then the analysts run
+    for every crypto through ANALYSIS_APP.batch with at most max_workers runs
+    in flight, and the portfolio decisions are sent to the LLM in one batch
+    with at most llm_max_concurrency requests in flight.
+
+    Returns:
+        dict: Decision (or error message) per crypto, in the order given
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        market_data = dict(
+            zip(
+                cryptos,
+                executor.map(
+                    lambda crypto: load_market_data(
+                        crypto, start_date, end_date, interval
+                    ),
+                    cryptos,
+                ),
+            )
+        )
+
+    results = {
+        crypto: "Cannot Run AI - Invalid Data"
+        for crypto in cryptos
+        if market_data[crypto] is None
+    }
+    valid_cryptos = [crypto for crypto in cryptos if market_data[crypto] is not None]
+    initial_states = [
+        build_initial_state(
+            crypto, dict(portfolio), market_data[crypto], show_reasoning, decision_mode
+        )
+        for crypto in valid_cryptos
+    ]
+
+    analysed_states = ANALYSIS_APP.batch(
+        initial_states,
+        config={"max_concurrency": max_workers},
+        return_exceptions=True,
+    )
+    final_states = decide_portfolio_batch(
+        [state for state in analysed_states if not isinstance(state, Exception)],
+        max_concurrency=llm_max_concurrency,
+    )
+    _collect_batch_results(results, valid_cryptos, analysed_states, final_states)
+
+    return {crypto: results[crypto] for crypto in cryptos}
+
+
+def _collect_batch_results(
+    results: dict, cryptos: list, analysed_states: list, final_states: list
+) -> None:
+    """Fill results with the decision or error of each analysed crypto."""
+    final_states = iter(final_states)
+    for crypto, analysed_state in zip(cryptos, analysed_states):
+        final_state = (
+            analysed_state
+            if isinstance(analysed_state, Exception)
+            else next(final_states)
+        )
+        if isinstance(final_state, Exception):
+            results[crypto] = f"Error running AI: {str(final_state)}"
+        else:
+            results[crypto] = final_state["messages"][-1].content
+
+
+async def arun_hedge_fund(
+    crypto: str,
+    start_date: str,
+    end_date: str,
+    portfolio: dict,
+    show_reasoning: bool = False,
+    decision_mode: str = "llm",
+    stream: bool = False,
+    on_decision=None,
+    interval: str = DEFAULT_INTERVAL,
+    return_message: bool = False,
+):
+    """Async version of run_hedge_fund, runs the graph with APP.ainvoke."""
+    market_data = await aload_market_data(crypto, start_date, end_date, interval)
+    if market_data is None:
+        return "Cannot Run AI - Invalid Data"
+
+    initial_state = build_initial_state(
+        crypto,
+        portfolio,
+        market_data,
+        show_reasoning,
+        decision_mode,
+        stream,
+        on_decision,
+    )
+
+    try:
+        final_state = await APP.ainvoke(initial_state)
+        message = final_state["messages"][-1]
+        return message if return_message else message.content
     except Exception as e:
         return f"Error running AI: {str(e)}"
 
 
+async def arun_hedge_fund_batch(
+    cryptos: list[str],
+    start_date: str,
+    end_date: str,
+    portfolio: dict,
+    show_reasoning: bool = False,
+    max_concurrency: int = 8,
+    llm_max_concurrency: int = None,
+    decision_mode: str = "llm",
+    interval: str = DEFAULT_INTERVAL,
+) -> dict[str, str]:
+    """Async version of run_hedge_fund_batch, runs on one event loop.
+
+    At most max_concurrency analysis pipelines are in flight at once, then
+    the portfolio decisions are sent to the LLM in one llm.abatch call with
+    at most llm_max_concurrency requests in flight.
+
+    Returns:
+        dict: Decision (or error message) per crypto, in the order given
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def analyse(crypto):
+        async with semaphore:
+            market_data = await aload_market_data(
+                crypto, start_date, end_date, interval
+            )
+            if market_data is None:
+                return None
+            initial_state = build_initial_state(
+                crypto, dict(portfolio), market_data, show_reasoning, decision_mode
+            )
+            try:
+                return await ANALYSIS_APP.ainvoke(initial_state)
+            except Exception as e:
+                return e
+
+    analysed = dict(
+        zip(cryptos, await asyncio.gather(*[analyse(crypto) for crypto in cryptos]))
+    )
+
+    results = {
+        crypto: "Cannot Run AI - Invalid Data"
+        for crypto in cryptos
+        if analysed[crypto] is None
+    }
+    valid_cryptos = [crypto for crypto in cryptos if analysed[crypto] is not None]
+    analysed_states = [analysed[crypto] for crypto in valid_cryptos]
+    final_states = await adecide_portfolio_batch(
+        [state for state in analysed_states if not isinstance(state, Exception)],
+        max_concurrency=llm_max_concurrency,
+    )
+    _collect_batch_results(results, valid_cryptos, analysed_states, final_states)
+
+    return {crypto: results[crypto] for crypto in cryptos}
+
+
+async def _run_and_close_sessions(coroutine):
+    """Await a coroutine, then close the async HTTP clients of the event loop.
+
+    asyncio.run closes its loop on return, so the clients created in it must
+    be closed before that.
+    """
+    try:
+        return await coroutine
+    finally:
+        await aclose_sessions()
+
+
 # Define the new workflow
-WORKFLOW = StateGraph(AgentState)
-WORKFLOW.add_node("market_data_agent", market_data_agent)
-WORKFLOW.add_node("technical_analyst_agent", technical_analyst_agent)
-WORKFLOW.add_node("sentiment_agent", sentiment_agent)
-WORKFLOW.add_node("risk_management_agent", risk_management_agent)
-WORKFLOW.add_node("portfolio_management_agent", portfolio_management_agent)
+# Nodes that do network I/O carry an async implementation used by APP.ainvoke
+def route_decision(state: AgentState) -> str:
+    """Pick the decision node from the run's decision_mode metadata."""
+    return state["metadata"].get("decision_mode", "llm")
 
-# Define the workflow once
-WORKFLOW.set_entry_point("market_data_agent")
-WORKFLOW.add_edge("market_data_agent", "technical_analyst_agent")
-WORKFLOW.add_edge("market_data_agent", "sentiment_agent")
-WORKFLOW.add_edge("technical_analyst_agent", "risk_management_agent")
-WORKFLOW.add_edge("sentiment_agent", "risk_management_agent")
-WORKFLOW.add_edge("risk_management_agent", "portfolio_management_agent")
-WORKFLOW.add_edge("portfolio_management_agent", END)
 
+def build_workflow(include_decision: bool = True) -> StateGraph:
+    """Build the agent workflow, optionally stopping before the portfolio manager.
+
+    Batch runs use the workflow without the decision so that the portfolio
+    manager prompts of every run can be sent to the LLM in one batch.
+    """
+    workflow = StateGraph(AgentState)
+    workflow.add_node(
+        "market_data_agent", RunnableLambda(market_data_agent, afunc=amarket_data_agent)
+    )
+    workflow.add_node("technical_analyst_agent", technical_analyst_agent)
+    workflow.add_node("sentiment_agent", sentiment_agent)
+    workflow.add_node("risk_management_agent", risk_management_agent)
+
+    workflow.set_entry_point("market_data_agent")
+    workflow.add_edge("market_data_agent", "technical_analyst_agent")
+    workflow.add_edge("market_data_agent", "sentiment_agent")
+    workflow.add_edge("technical_analyst_agent", "risk_management_agent")
+    workflow.add_edge("sentiment_agent", "risk_management_agent")
+
+    if include_decision:
+        workflow.add_node(
+            "portfolio_management_agent",
+            RunnableLambda(portfolio_management_agent, afunc=aportfolio_management_agent),
+        )
+        workflow.add_node("rule_based_portfolio_agent", rule_based_portfolio_agent)
+        workflow.add_conditional_edges(
+            "risk_management_agent",
+            route_decision,
+            {
+                "llm": "portfolio_management_agent",
+                "rules": "rule_based_portfolio_agent",
+            },
+        )
+        workflow.add_edge("portfolio_management_agent", END)
+        workflow.add_edge("rule_based_portfolio_agent", END)
+    else:
+        workflow.add_edge("risk_management_agent", END)
+    return workflow
+
+
+# Define the workflow once
+WORKFLOW = build_workflow()
 APP = WORKFLOW.compile()
+ANALYSIS_APP = build_workflow(include_decision=False).compile()
 
 def validate_date(date_str: str, date_type: str) -> None:
     """Validate date format
@@ -158,6 +443,10 @@ DEFAULT_PORTFOLIO = {
     "risk": 0.05
 }
 
+def print_early_decision(crypto: str, action: str, quantity: int) -> None:
+    """on_decision callback of the CLI's streaming mode"""
+    print(f"\n>>> Decision for {crypto}: {action} {quantity}\n", flush=True)
+
 def create_portfolio(args) -> dict:
     """Create portfolio with defaults if needed"""
     return {
@@ -170,14 +459,14 @@ if __name__ == "__main__":
     print("\nWelcome to AI Coin Trading System")
     print("===================================")
 
-    # Select LLM provider before parsing arguments
-    selected_provider = select_llm_provider()
-    model_name = get_model_name(selected_provider)
-    print(f"\nUsing {selected_provider.upper()} as LLM provider")
-    print(f"Model: {model_name}")
-
     parser = argparse.ArgumentParser(description="Run the hedge fund trading system")
-    parser.add_argument("--crypto", type=str, required=True, help="Crypto symbol")
+    parser.add_argument(
+        "--crypto",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Crypto symbol(s). Several symbols are run in one batch",
+    )
     parser.add_argument(
         "--balance",
         type=float,
@@ -199,22 +488,100 @@ if __name__ == "__main__":
     parser.add_argument(
         "--end-date", type=str, help="End date (YYYY-MM-DD). Defaults to today"
     )
+    parser.add_argument(
+        "--interval",
+        choices=list(INTERVAL_MS),
+        default=DEFAULT_INTERVAL,
+        help="Candle interval of the analysed prices, e.g. 1d for daily bars. Default: 1h",
+    )
     parser.add_argument(
         "--show-reasoning", action="store_true", help="Show reasoning from each agent"
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=8,
+        help="Maximum number of cryptos processed concurrently in batch mode. Default: 8",
+    )
+    parser.add_argument(
+        "--llm-max-concurrency",
+        type=int,
+        help="Maximum number of concurrent LLM requests in batch mode. Default: LLM_MAX_CONCURRENCY or 8",
+    )
+    parser.add_argument(
+        "--decision",
+        choices=DECISION_MODES,
+        default="llm",
+        help="Final decision: llm (portfolio manager) or rules (weighted signals, no LLM call). Default: llm",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Single crypto: stream the portfolio manager's output and print the action as soon as it is known",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the batch on a single event loop instead of a worker pool",
+    )
 
     args = parser.parse_args()
 
+    # The rule-based decision never calls the LLM
+    if args.decision == "llm":
+        selected_provider = select_llm_provider()
+        model_name = get_model_name(selected_provider)
+        print(f"\nUsing {selected_provider.upper()} as LLM provider")
+        print(f"Model: {model_name}")
+
     validate_date(args.start_date, "Start")
     validate_date(args.end_date, "End")
 
     portfolio = create_portfolio(args)
-    result = run_hedge_fund(
-        crypto=args.crypto,
-        start_date=args.start_date,
-        end_date=args.end_date,
-        portfolio=portfolio,
-        show_reasoning=args.show_reasoning,
-    )
-    print("\nFinal Result:")
-    print(result)
+    if len(args.crypto) == 1:
+        result = run_hedge_fund(
+            crypto=args.crypto[0],
+            start_date=args.start_date,
+            end_date=args.end_date,
+            portfolio=portfolio,
+            show_reasoning=args.show_reasoning,
+            decision_mode=args.decision,
+            stream=args.stream,
+            on_decision=print_early_decision if args.stream else None,
+            interval=args.interval,
+        )
+        print("\nFinal Result:")
+        print(render_decision_markdown(result))
+    elif args.use_async:
+        results = asyncio.run(
+            _run_and_close_sessions(
+                arun_hedge_fund_batch(
+                    cryptos=args.crypto,
+                    start_date=args.start_date,
+                    end_date=args.end_date,
+                    portfolio=portfolio,
+                    show_reasoning=args.show_reasoning,
+                    max_concurrency=args.max_workers,
+                    llm_max_concurrency=args.llm_max_concurrency,
+                    decision_mode=args.decision,
+                    interval=args.interval,
+                )
+            )
+        )
+    else:
+        results = run_hedge_fund_batch(
+            cryptos=args.crypto,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            portfolio=portfolio,
+            show_reasoning=args.show_reasoning,
+            max_workers=args.max_workers,
+            llm_max_concurrency=args.llm_max_concurrency,
+            decision_mode=args.decision,
+            interval=args.interval,
+        )
+    if len(args.crypto) > 1:
+        for crypto, result in results.items():
+            print(f"\nFinal Result ({crypto}):")
+            print(render_decision_markdown(result))
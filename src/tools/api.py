@@ -1,9 +1,19 @@
+import asyncio
 import os
+import numpy as np
 import pandas as pd
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
-import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.candle_store import CANDLE_COLUMNS, INTERVAL_MS, get_candle_store
+from tools.http_client import ahttp_post, http_get, http_post
+from tools.json_codec import dumps, loads
+from tools.price_frame import price_dtype, to_time_index
+from tools.resample import DEFAULT_INTERVAL, resample_candles, source_intervals
 
 
 load_dotenv(".env", override=True)
@@ -12,6 +22,20 @@ HYPERLIQUID_API_URL = os.environ.get("HYPERLIQUID_API_URL")
 BINANCE_API_URL = os.environ.get("BINANCE_API_URL")
 API_COPIN_OI = os.environ.get("API_COPIN_OI")
 
+HYPERLIQUID_MAX_CANDLES = 5000
+# candleSnapshot fields of open, close, high, low and volume (CANDLE_COLUMNS)
+_HYPERLIQUID_PRICE_FIELDS = ("o", "c", "h", "l", "v")
+
+BINANCE_MAX_CANDLES = 1500
+# Kline positions of open, close, high, low and volume (CANDLE_COLUMNS)
+_BINANCE_PRICE_FIELDS = (1, 4, 2, 3, 5)
+BINANCE_MAX_WORKERS = int(os.environ.get("BINANCE_MAX_WORKERS", 4))
+BINANCE_WEIGHT_PER_MINUTE = int(os.environ.get("BINANCE_WEIGHT_PER_MINUTE", 1000))
+
+COPIN_PAGE_LIMIT = 500
+COPIN_MAX_POSITIONS = int(os.environ.get("COPIN_MAX_POSITIONS", 5000))
+COPIN_MAX_WORKERS = 4
+
 
 def date_to_timestamp(date):
     """
@@ -30,17 +54,242 @@ def date_to_timestamp(date):
     return timestamp_milliseconds
 
 
-def get_price_API_HYPERLIQUID(pair, open_time, close_time):
+def _candle_requests_HYPERLIQUID(pair, interval, start_ms, end_ms):
+    """
+    Build the candleSnapshot request bodies covering [start_ms, end_ms].
+
+    The endpoint returns at most HYPERLIQUID_MAX_CANDLES candles per request, so
+    longer ranges are split into consecutive requests.
+    """
+    chunk_ms = HYPERLIQUID_MAX_CANDLES * INTERVAL_MS[interval]
+    return [
+        {
+            "type": "candleSnapshot",
+            "req": {
+                "coin": pair,
+                "interval": interval,
+                "startTime": chunk_start,
+                "endTime": min(chunk_start + chunk_ms - 1, end_ms),
+            },
+        }
+        for chunk_start in range(start_ms, end_ms + 1, chunk_ms)
+    ]
+
+
+def _fill_prices(target, values):
+    """Decode a list of JSON prices (numbers or numeric strings) into target."""
+    try:
+        target[:] = values
+    except ValueError:
+        # Malformed values become NaN instead of failing the whole fetch
+        target[:] = pd.to_numeric(values, errors="coerce")
+
+
+def _parse_candles_HYPERLIQUID(candles_list, dtype=np.float64):
+    """
+    Convert decoded candleSnapshot responses into candle arrays.
+
+    Prices are decoded straight into arrays allocated once for all responses,
+    without an intermediate DataFrame of strings.
+
+    Args:
+        candles_list (list): One decoded response (list of candles) per request
+        dtype: Price dtype, np.float64 (default) or np.float32
+
+    Returns:
+        tuple: (timestamps, ohlcv) where timestamps is an int64 array of candle
+        open times and ohlcv a C-contiguous dtype array of shape (5, n) ordered
+        as CANDLE_COLUMNS
+    """
+    for candles in candles_list:
+        if not isinstance(candles, list):
+            raise ValueError(f"Unexpected candleSnapshot response: {candles}")
+
+    total = sum(len(candles) for candles in candles_list)
+    timestamps = np.empty(total, dtype=np.int64)
+    ohlcv = np.empty((len(CANDLE_COLUMNS), total), dtype=dtype)
+    offset = 0
+    for candles in candles_list:
+        end = offset + len(candles)
+        timestamps[offset:end] = [candle["t"] for candle in candles]
+        for row, field in enumerate(_HYPERLIQUID_PRICE_FIELDS):
+            _fill_prices(ohlcv[row, offset:end], [candle[field] for candle in candles])
+        offset = end
+    return timestamps, ohlcv
+
+
+def _request_candles_HYPERLIQUID(
+    pair, interval, start_ms, end_ms, dtype=np.float64
+):
+    """
+    Download candles from the HyperLiquid candleSnapshot endpoint.
+
+    Args:
+        pair (str): Trading pair symbol
+        interval (str): Candle interval, e.g. "1h"
+        start_ms (int): Start time in milliseconds (inclusive)
+        end_ms (int): End time in milliseconds (inclusive)
+        dtype: Price dtype, see _parse_candles_HYPERLIQUID
+
+    Returns:
+        tuple: (timestamps, ohlcv), see _parse_candles_HYPERLIQUID
+    """
+    headers = {"Content-Type": "application/json"}
+    return _parse_candles_HYPERLIQUID(
+        [
+            loads(http_post(HYPERLIQUID_API_URL, json=body, headers=headers).content)
+            for body in _candle_requests_HYPERLIQUID(pair, interval, start_ms, end_ms)
+        ],
+        dtype,
+    )
+
+
+async def _arequest_candles_HYPERLIQUID(
+    pair, interval, start_ms, end_ms, dtype=np.float64
+):
+    """Async version of _request_candles_HYPERLIQUID, chunks are fetched concurrently."""
+    headers = {"Content-Type": "application/json"}
+    responses = await asyncio.gather(
+        *[
+            ahttp_post(HYPERLIQUID_API_URL, json=body, headers=headers)
+            for body in _candle_requests_HYPERLIQUID(pair, interval, start_ms, end_ms)
+        ]
+    )
+    return _parse_candles_HYPERLIQUID(
+        [loads(response.content) for response in responses], dtype
+    )
+
+
+def _store_candles_HYPERLIQUID(
+    store, pair, interval, missing_start, missing_end, timestamps, ohlcv
+):
+    """
+    Merge a downloaded range into the candle store.
+
+    Candles that are still open at download time are stored but not marked as
+    covered, so they are refreshed on the next call.
+    """
+    if len(timestamps) == 0:
+        # Do not cache emptiness, the pair may be unknown or not listed yet
+        return
+    last_closed = int(datetime.now().timestamp() * 1000) - INTERVAL_MS[interval]
+    store.merge(
+        pair,
+        interval,
+        timestamps,
+        ohlcv,
+        missing_start,
+        min(missing_end, last_closed),
+    )
+
+
+def _fill_candle_store_HYPERLIQUID(store, pair, interval, start_ms, end_ms):
+    """Download the parts of [start_ms, end_ms] the candle store does not cover yet."""
+    for missing_start, missing_end in store.missing_ranges(
+        pair, interval, start_ms, end_ms
+    ):
+        timestamps, ohlcv = _request_candles_HYPERLIQUID(
+            pair, interval, missing_start, missing_end
+        )
+        _store_candles_HYPERLIQUID(
+            store, pair, interval, missing_start, missing_end, timestamps, ohlcv
+        )
+
+
+async def _afill_candle_store_HYPERLIQUID(store, pair, interval, start_ms, end_ms):
+    """
+    Async version of _fill_candle_store_HYPERLIQUID, ranges are fetched concurrently.
+
+    Store reads and merges load and rewrite .npy files under a lock, so they
+    run in worker threads to keep the event loop free for other symbols.
+    """
+    missing = await asyncio.to_thread(
+        store.missing_ranges, pair, interval, start_ms, end_ms
+    )
+    downloads = await asyncio.gather(
+        *[
+            _arequest_candles_HYPERLIQUID(pair, interval, missing_start, missing_end)
+            for missing_start, missing_end in missing
+        ]
+    )
+    for (missing_start, missing_end), (timestamps, ohlcv) in zip(missing, downloads):
+        await asyncio.to_thread(
+            _store_candles_HYPERLIQUID,
+            store,
+            pair,
+            interval,
+            missing_start,
+            missing_end,
+            timestamps,
+            ohlcv,
+        )
+
+
+def _read_candle_store(store, pair, interval, start_ms, end_ms):
+    """
+    Read [start_ms, end_ms] from the candle store without downloading anything.
+
+    Candles of the interval itself are used when the store covers the range,
+    otherwise they are resampled from the coarsest finer interval that covers
+    it, e.g. daily candles from cached hourly ones.
+
+    Returns:
+        tuple: (timestamps, ohlcv), or None if no interval covers the range
+    """
+    if not store.missing_ranges(pair, interval, start_ms, end_ms):
+        return store.read(pair, interval, start_ms, end_ms)
+
+    # Every candle opening within the range is built from whole source candles
+    interval_ms = INTERVAL_MS[interval]
+    first_open = start_ms + (-start_ms) % interval_ms
+    last_close = end_ms - end_ms % interval_ms + interval_ms - 1
+    if first_open > end_ms:
+        return None
+    for source in source_intervals(interval):
+        if not store.missing_ranges(pair, source, first_open, last_close):
+            timestamps, ohlcv = store.read(pair, source, first_open, last_close)
+            return resample_candles(timestamps, ohlcv, interval)
+    return None
+
+
+def _candles_to_frame(pair, timestamps, ohlcv):
+    """
+    Build the price DataFrame returned by the price fetchers.
+
+    The frame is indexed by candle open time as a sorted, unique UTC
+    DatetimeIndex, with PRICE_DTYPE columns (see tools/price_frame.py). A
+    writable C-contiguous ohlcv array of that dtype, as returned by the
+    parsers, is wrapped without copying; store reads are copied.
+    """
+    if len(timestamps) == 0:
+        raise ValueError(f"No candles found for {pair}")
+    ohlcv = np.require(ohlcv, dtype=price_dtype(), requirements=["C", "W"])
+    return pd.DataFrame(
+        ohlcv.T,
+        columns=CANDLE_COLUMNS,
+        index=to_time_index(timestamps),
+        copy=False,
+    )
+
+
+def get_price_API_HYPERLIQUID(pair, open_time, close_time, interval=DEFAULT_INTERVAL):
     """
     Fetch historical price data from HyperLiquid API.
 
+    Candles are served from the local candle store (see tools/candle_store.py)
+    when enabled; only time ranges that are not cached yet are downloaded.
+    Candles already cached at a finer interval are resampled locally instead
+    of being downloaded again.
+
     Args:
         pair (str): Trading pair symbol
         open_time (str or datetime): Start time for data fetch
         close_time (str or datetime): End time for data fetch
+        interval (str, optional): Candle interval. Defaults to DEFAULT_INTERVAL ("1h")
 
     Returns:
-        pandas.DataFrame: DataFrame containing OHLCV data with columns:
+        pandas.DataFrame: DataFrame indexed by candle open time (UTC
+        DatetimeIndex named "timestamp") containing OHLCV data with columns:
             - open: Opening price
             - close: Closing price
             - high: Highest price
@@ -50,64 +299,219 @@ def get_price_API_HYPERLIQUID(pair, open_time, close_time):
     """
     open_time = date_to_timestamp(open_time)
     close_time = date_to_timestamp(close_time)
-    APIURL = HYPERLIQUID_API_URL
-
-    data = {
-        "type": "candleSnapshot",
-        "req": {
-            "coin": pair,
-            "interval": "1h",
-            "startTime": open_time,
-            "endTime": close_time,
-        },
-    }
-
-    headers = {"Content-Type": "application/json"}
+    store = get_candle_store()
 
     try:
-        response = requests.post(APIURL, json=data, headers=headers)
-        data = response.json()
-        df = pd.DataFrame(data)
-        df.rename(
-            columns={
-                "t": "timestamp",
-                "T": "close_time",
-                "s": "symbol",
-                "i": "interval",
-                "o": "open",
-                "c": "close",
-                "h": "high",
-                "l": "low",
-                "v": "volume",
-                "n": "number_of_trades",
-            },
-            inplace=True,
-        )
+        if store is None:
+            timestamps, ohlcv = _request_candles_HYPERLIQUID(
+                pair, interval, open_time, close_time, price_dtype()
+            )
+        else:
+            candles = _read_candle_store(store, pair, interval, open_time, close_time)
+            if candles is None:
+                _fill_candle_store_HYPERLIQUID(
+                    store, pair, interval, open_time, close_time
+                )
+                candles = store.read(pair, interval, open_time, close_time)
+            timestamps, ohlcv = candles
+
+        return _candles_to_frame(pair, timestamps, ohlcv)
+    except Exception as e:
+        print(e)
+        return "Cannot find price of this crypto"
+
+
+async def aget_price_API_HYPERLIQUID(
+    pair, open_time, close_time, interval=DEFAULT_INTERVAL
+):
+    """
+    Async version of get_price_API_HYPERLIQUID.
+
+    Returns:
+        pandas.DataFrame: Same frame as get_price_API_HYPERLIQUID
+        str: Error message if request fails
+    """
+    open_time = date_to_timestamp(open_time)
+    close_time = date_to_timestamp(close_time)
+    store = get_candle_store()
 
-        df = df[["open", "close", "high", "low", "volume"]]
-        numeric_cols = ["open", "close", "high", "low", "volume"]
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        df.sort_index(inplace=True)
+    try:
+        if store is None:
+            timestamps, ohlcv = await _arequest_candles_HYPERLIQUID(
+                pair, interval, open_time, close_time, price_dtype()
+            )
+        else:
+            # Store reads hit the disk, keep them off the event loop
+            candles = await asyncio.to_thread(
+                _read_candle_store, store, pair, interval, open_time, close_time
+            )
+            if candles is None:
+                await _afill_candle_store_HYPERLIQUID(
+                    store, pair, interval, open_time, close_time
+                )
+                candles = await asyncio.to_thread(
+                    store.read, pair, interval, open_time, close_time
+                )
+            timestamps, ohlcv = candles
 
-        return df
+        return _candles_to_frame(pair, timestamps, ohlcv)
     except Exception as e:
         print(e)
         return "Cannot find price of this crypto"
 
 
-def get_price_API_BINANCE(pair, open_time, close_time, limit: int = 1000):
+def _binance_request_weight(limit: int) -> int:
+    """Request weight of a continuousKlines call, which grows with its limit."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class _WeightBudget:
+    """
+    Request weight budget over a sliding one minute window.
+
+    Binance bans IPs that exceed their weight per minute, so concurrent chunk
+    requests wait here until the window has room for them.
+    """
+
+    def __init__(self, weight_per_minute: int):
+        self.weight_per_minute = weight_per_minute
+        self._spent = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: int) -> None:
+        """Block until weight can be spent without exceeding the budget."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._spent and now - self._spent[0][0] >= 60:
+                    self._spent.popleft()
+                used = sum(spent for _, spent in self._spent)
+                if not self._spent or used + weight <= self.weight_per_minute:
+                    self._spent.append((now, weight))
+                    return
+                delay = 60 - (now - self._spent[0][0])
+            time.sleep(delay)
+
+
+_binance_budget = _WeightBudget(BINANCE_WEIGHT_PER_MINUTE)
+
+
+def _kline_requests_BINANCE(pair, interval, start_ms, end_ms, limit):
+    """
+    Build the continuousKlines query parameters covering [start_ms, end_ms].
+
+    Each request returns at most limit candles, so longer ranges are split into
+    consecutive limit sized chunks.
+    """
+    chunk_ms = limit * INTERVAL_MS[interval]
+    return [
+        {
+            "pair": pair,
+            "contractType": "PERPETUAL",
+            "interval": interval,
+            "startTime": chunk_start,
+            "endTime": min(chunk_start + chunk_ms - 1, end_ms),
+            "limit": limit,
+        }
+        for chunk_start in range(start_ms, end_ms + 1, chunk_ms)
+    ]
+
+
+def _request_klines_BINANCE(params):
+    """Download one chunk of klines, waiting for the request weight budget."""
+    _binance_budget.acquire(_binance_request_weight(params["limit"]))
+    response = http_get(BINANCE_API_URL + "/fapi/v1/continuousKlines", params=params)
+    return loads(response.content)
+
+
+def _parse_klines_BINANCE(klines_list, dtype=np.float64):
+    """
+    Convert decoded continuousKlines responses into candle arrays.
+
+    Chunks may overlap at their bounds, so candles are de-duplicated on their
+    open time and sorted.
+
+    Args:
+        klines_list (list): One decoded response (list of klines) per request
+        dtype: Price dtype, np.float64 (default) or np.float32
+
+    Returns:
+        tuple: (timestamps, ohlcv), see _parse_candles_HYPERLIQUID
+    """
+    rows = []
+    for klines in klines_list:
+        if not isinstance(klines, list):
+            raise ValueError(f"Unexpected continuousKlines response: {klines}")
+        rows.extend(klines)
+
+    timestamps = np.array([row[0] for row in rows], dtype=np.int64)
+    ohlcv = np.empty((len(CANDLE_COLUMNS), len(rows)), dtype=dtype)
+    for row, field in enumerate(_BINANCE_PRICE_FIELDS):
+        _fill_prices(ohlcv[row], [kline[field] for kline in rows])
+    timestamps, first = np.unique(timestamps, return_index=True)
+    return timestamps, ohlcv[:, first]
+
+
+def fetch_klines_BINANCE(
+    pair,
+    interval,
+    start_ms,
+    end_ms,
+    limit: int = 1000,
+    max_workers: int = None,
+    dtype=np.float64,
+):
+    """
+    Fetch every kline of [start_ms, end_ms] from Binance Futures.
+
+    The range is split into limit sized chunks that are fetched concurrently,
+    within the BINANCE_WEIGHT_PER_MINUTE request weight budget.
+
+    Args:
+        pair (str): Trading pair symbol
+        interval (str): Candle interval, e.g. "1h"
+        start_ms (int): Start time in milliseconds (inclusive)
+        end_ms (int): End time in milliseconds (inclusive)
+        limit (int): Candles per request, at most BINANCE_MAX_CANDLES
+        max_workers (int, optional): Concurrent requests. Defaults to
+            BINANCE_MAX_WORKERS
+        dtype: Price dtype, np.float64 (default) or np.float32
+
+    Returns:
+        tuple: (timestamps, ohlcv), see _parse_candles_HYPERLIQUID
+    """
+    limit = max(1, min(limit, BINANCE_MAX_CANDLES))
+    chunks = _kline_requests_BINANCE(pair, interval, start_ms, end_ms, limit)
+    with ThreadPoolExecutor(max_workers=max_workers or BINANCE_MAX_WORKERS) as executor:
+        klines_list = list(executor.map(_request_klines_BINANCE, chunks))
+    return _parse_klines_BINANCE(klines_list, dtype)
+
+
+def get_price_API_BINANCE(
+    pair, open_time, close_time, limit: int = 1000, interval=DEFAULT_INTERVAL
+):
     """
     Fetch historical price data from Binance Futures API.
 
+    Ranges longer than limit candles are fetched in concurrent chunks, see
+    fetch_klines_BINANCE.
+
     Args:
         pair (str): Trading pair symbol
         open_time (str or datetime): Start time for data fetch
         close_time (str or datetime): End time for data fetch
-        limit (int, optional): Maximum number of records to return. Defaults to 1000
+        limit (int, optional): Maximum number of candles per request. Defaults to 1000
+        interval (str, optional): Candle interval. Defaults to DEFAULT_INTERVAL ("1h")
 
     Returns:
-        pandas.DataFrame: DataFrame containing OHLCV data with columns:
+        pandas.DataFrame: DataFrame indexed by candle open time (UTC
+        DatetimeIndex named "timestamp") containing OHLCV data with columns:
             - open: Opening price
             - close: Closing price
             - high: Highest price
@@ -117,69 +521,34 @@ def get_price_API_BINANCE(pair, open_time, close_time, limit: int = 1000):
     """
     open_time = date_to_timestamp(open_time)
     close_time = date_to_timestamp(close_time)
-    APIURL = BINANCE_API_URL + "/fapi/v1/continuousKlines"
-    paramsMap = {
-        "pair": pair,
-        "contractType": "PERPETUAL",
-        "interval": "1h",
-        "startTime": open_time,
-        "endTime": close_time,
-        "limit": limit,
-    }
     try:
-        response = requests.get(APIURL, params=paramsMap)
-        print(paramsMap)
-        data = response.json()
-        df = pd.DataFrame(
-            data,
-            columns=[
-                "timestamp",
-                "open",
-                "high",
-                "low",
-                "close",
-                "volume",
-                "close_time",
-                "quote_asset_volume",
-                "number_of_trades",
-                "taker_buy_base_asset_volume",
-                "taker_buy_quote_asset_volume",
-                "ignore",
-            ],
+        timestamps, ohlcv = fetch_klines_BINANCE(
+            pair, interval, open_time, close_time, limit, dtype=price_dtype()
         )
-
-        df = df[["open", "close", "high", "low", "volume"]]
-        numeric_cols = ["open", "close", "high", "low", "volume"]
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        df.sort_index(inplace=True)
-
-        return df
+        return _candles_to_frame(pair, timestamps, ohlcv)
     except Exception as e:
         print(e)
         return "Cannot find price of this crypto"
 
 
-def get_OI_position_Copin(pair: str, isLong: bool):
+def _OI_query_Copin(pair: str, isLong: bool, offset: int):
     """
-    Fetch open interest data for a specific position type from Copin API.
+    Build the Copin query for one page of open positions.
 
     Args:
-        pair (str): Trading pair symbol (without -USDT suffix)
+        pair (str): Trading pair symbol (with -USDT suffix)
         isLong (bool): True for long positions, False for short positions
+        offset (int): Offset of the first position of the page
 
     Returns:
-        float: Total size of open interest for the specified position type
-        str: Error message if request fails
+        str: JSON encoded query
     """
-    APIURL = API_COPIN_OI
-    pair = pair + "-USDT"
     if isLong:
         value_long = "true"
     else:
         value_long = "false"
     query = {
-        "pagination": {"limit": 500, "offset": 0},
+        "pagination": {"limit": COPIN_PAGE_LIMIT, "offset": offset},
         "queries": [
             {"fieldName": "pair", "value": pair},
             {"fieldName": "isLong", "value": value_long},
@@ -187,18 +556,198 @@ def get_OI_position_Copin(pair: str, isLong: bool):
         "sortBy": "size",
         "sortType": "desc",
     }
+    return dumps(query)
+
+
+def _request_OI_page_Copin(pair: str, isLong: bool, offset: int):
+    """
+    Fetch one page of open positions from Copin API.
+
+    Returns:
+        dict: Decoded response with "data" (positions) and, when provided by
+        the API, "meta" (pagination info including "total")
+    """
+    headers = {"Content-Type": "application/json"}
+    response = http_post(
+        API_COPIN_OI, headers=headers, data=_OI_query_Copin(pair, isLong, offset)
+    )
+    return loads(response.content)
+
+
+async def _arequest_OI_page_Copin(pair: str, isLong: bool, offset: int):
+    """Async version of _request_OI_page_Copin."""
     headers = {"Content-Type": "application/json"}
+    response = await ahttp_post(
+        API_COPIN_OI, headers=headers, content=_OI_query_Copin(pair, isLong, offset)
+    )
+    return loads(response.content)
+
+
+def _remaining_OI_offsets_Copin(first_page, max_positions):
+    """
+    Plan the remaining pages from the first page of a Copin query.
+
+    Returns:
+        tuple: (offsets, truncated) where offsets lists the pages left to fetch,
+        or is None if the API did not report the total number of positions
+    """
+    total = (first_page.get("meta") or {}).get("total")
+    if total is None:
+        return None, False
+    offsets = range(COPIN_PAGE_LIMIT, min(total, max_positions), COPIN_PAGE_LIMIT)
+    return offsets, total > max_positions
+
+
+def fetch_OI_position_Copin(
+    pair: str, isLong: bool, max_positions: int = COPIN_MAX_POSITIONS
+):
+    """
+    Fetch the total open interest of one side, paging through all positions.
+
+    When the API reports the total number of positions, the remaining pages
+    are fetched concurrently; otherwise pages are read until a short page.
+
+    Args:
+        pair (str): Trading pair symbol (without -USDT suffix)
+        isLong (bool): True for long positions, False for short positions
+        max_positions (int): Maximum number of positions to read
+
+    Returns:
+        tuple: (total_size, truncated) where truncated is True if more than
+        max_positions positions were open and the sum only covers the largest
+    """
+    pair = pair + "-USDT"
+    first_page = _request_OI_page_Copin(pair, isLong, 0)
+    positions = list(first_page["data"])
+    offsets, truncated = _remaining_OI_offsets_Copin(first_page, max_positions)
+
+    if offsets is not None:
+        with ThreadPoolExecutor(max_workers=COPIN_MAX_WORKERS) as executor:
+            pages = executor.map(
+                lambda offset: _request_OI_page_Copin(pair, isLong, offset), offsets
+            )
+            for page in pages:
+                positions.extend(page["data"])
+    else:
+        # Read past the cap until a short page, so that exactly max_positions
+        # open positions are not reported as truncated
+        page = first_page
+        while (
+            len(page["data"]) == COPIN_PAGE_LIMIT and len(positions) <= max_positions
+        ):
+            page = _request_OI_page_Copin(pair, isLong, len(positions))
+            positions.extend(page["data"])
+        truncated = len(positions) > max_positions
+
+    total_size = sum(d["size"] for d in positions[:max_positions])
+    return total_size, truncated
+
+
+async def afetch_OI_position_Copin(
+    pair: str, isLong: bool, max_positions: int = COPIN_MAX_POSITIONS
+):
+    """Async version of fetch_OI_position_Copin."""
+    pair = pair + "-USDT"
+    first_page = await _arequest_OI_page_Copin(pair, isLong, 0)
+    positions = list(first_page["data"])
+    offsets, truncated = _remaining_OI_offsets_Copin(first_page, max_positions)
+
+    if offsets is not None:
+        pages = await asyncio.gather(
+            *[_arequest_OI_page_Copin(pair, isLong, offset) for offset in offsets]
+        )
+        for page in pages:
+            positions.extend(page["data"])
+    else:
+        # Read past the cap until a short page, so that exactly max_positions
+        # open positions are not reported as truncated
+        page = first_page
+        while (
+            len(page["data"]) == COPIN_PAGE_LIMIT and len(positions) <= max_positions
+        ):
+            page = await _arequest_OI_page_Copin(pair, isLong, len(positions))
+            positions.extend(page["data"])
+        truncated = len(positions) > max_positions
+
+    total_size = sum(d["size"] for d in positions[:max_positions])
+    return total_size, truncated
+
+
+def get_OI_position_Copin(pair: str, isLong: bool):
+    """
+    Fetch open interest data for a specific position type from Copin API.
+
+    Args:
+        pair (str): Trading pair symbol (without -USDT suffix)
+        isLong (bool): True for long positions, False for short positions
+
+    Returns:
+        float: Total size of open interest for the specified position type
+        str: Error message if request fails
+    """
     try:
-        response = requests.post(APIURL, headers=headers, data=json.dumps(query))
-        data = response.json()
-        df = data["data"]
-        total_size = sum(d["size"] for d in df)
+        total_size, _ = fetch_OI_position_Copin(pair, isLong)
         return total_size
     except Exception as e:
         print(e)
         return "Cannot find OI of this crypto"
 
 
+def get_LS_OI_Copin_report(pair):
+    """
+    Fetch long and short open interest from Copin API concurrently.
+
+    Args:
+        pair (str): Trading pair symbol (without -USDT suffix)
+
+    Returns:
+        dict: Dictionary with:
+            - long: Total long open interest
+            - short: Total short open interest
+            - truncated: True if either side hit the COPIN_MAX_POSITIONS cap
+        str: Error message if request fails
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            long_future = executor.submit(fetch_OI_position_Copin, pair, True)
+            short_future = executor.submit(fetch_OI_position_Copin, pair, False)
+            longOI, long_truncated = long_future.result()
+            shortOI, short_truncated = short_future.result()
+    except Exception as e:
+        print(e)
+        return "Cannot find OI of this crypto"
+
+    return {
+        "long": longOI,
+        "short": shortOI,
+        "truncated": long_truncated or short_truncated,
+    }
+
+
+async def aget_LS_OI_Copin_report(pair):
+    """
+    Async version of get_LS_OI_Copin_report.
+
+    Returns:
+        dict: long, short and truncated, see get_LS_OI_Copin_report
+        str: Error message if request fails
+    """
+    try:
+        (longOI, long_truncated), (shortOI, short_truncated) = await asyncio.gather(
+            afetch_OI_position_Copin(pair, True),
+            afetch_OI_position_Copin(pair, False),
+        )
+    except Exception as e:
+        print(e)
+        return "Cannot find OI of this crypto"
+
+    return {
+        "long": longOI,
+        "short": shortOI,
+        "truncated": long_truncated or short_truncated,
+    }
+
+
 def get_LS_OI_Copin(pair):
     """
     Fetch both long and short open interest data from Copin API.
@@ -210,9 +759,8 @@ def get_LS_OI_Copin(pair):
         tuple: (long_oi, short_oi) containing the total open interest for long and short positions
         str: Error message if request fails
     """
-    longOI = get_OI_position_Copin(pair, True)
-    shortOI = get_OI_position_Copin(pair, False)
-    if isinstance(longOI, str) | isinstance(shortOI, str):
-        return "Cannot find OI of this crypto"
+    report = get_LS_OI_Copin_report(pair)
+    if isinstance(report, str):
+        return report
 
-    return longOI, shortOI
+    return report["long"], report["short"]
@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+
+CANDLE_COLUMNS = ["open", "close", "high", "low", "volume"]
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 3_600_000,
+    "2h": 2 * 3_600_000,
+    "4h": 4 * 3_600_000,
+    "8h": 8 * 3_600_000,
+    "12h": 12 * 3_600_000,
+    "1d": 86_400_000,
+}
+
+# Age after which array files of versions no merge kept are deleted
+ORPHAN_MAX_AGE_S = 60
+
+
+class CandleStore:
+    """On-disk OHLCV candle store, one partition per coin and interval.
+
+    Each partition is a directory holding:
+        - timestamp-<version>.npy: int64 candle open times in milliseconds,
+          sorted and unique
+        - ohlcv-<version>.npy: float64 array of shape (5, n), rows ordered as
+          CANDLE_COLUMNS
+        - coverage.json: the current and previous versions and the list of
+          [start_ms, end_ms] ranges already downloaded
+
+    Arrays are loaded memory-mapped so reading a window only touches the pages
+    it needs. Coverage is tracked separately from the candles themselves so that
+    ranges without trades are not re-downloaded on every call.
+
+    Every merge writes a new version of the arrays and then switches to it by
+    replacing coverage.json, so readers, in this process or in another one
+    sharing the directory, see either the old or the new candles, never a mix.
+    The previous version is kept for readers that resolved it just before the
+    switch, older ones are deleted by the next merge.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        # Reentrant so that merge can load the partition it is rewriting
+        self._lock = threading.RLock()
+
+    def _partition(self, coin: str, interval: str) -> str:
+        return os.path.join(self.root, coin.replace("/", "_"), interval)
+
+    def _manifest(self, coin: str, interval: str) -> tuple:
+        """Return (version, previous, ranges) from coverage.json.
+
+        Missing partitions give (None, None, []).
+        """
+        path = os.path.join(self._partition(coin, interval), "coverage.json")
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None, None, []
+        if isinstance(manifest, list):
+            # Partitions written before versioning: unversioned array files
+            return None, None, [tuple(r) for r in manifest]
+        return (
+            manifest["version"],
+            manifest.get("previous"),
+            [tuple(r) for r in manifest["ranges"]],
+        )
+
+    @staticmethod
+    def _array_paths(partition: str, version) -> tuple:
+        suffix = "" if version is None else f"-{version}"
+        return (
+            os.path.join(partition, f"timestamp{suffix}.npy"),
+            os.path.join(partition, f"ohlcv{suffix}.npy"),
+        )
+
+    def coverage(self, coin: str, interval: str) -> list:
+        """Return the sorted, merged list of downloaded [start_ms, end_ms] ranges."""
+        return self._manifest(coin, interval)[2]
+
+    def load(
+        self, coin: str, interval: str, mmap: bool = True
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, ohlcv) for a partition, memory-mapped by default."""
+        partition = self._partition(coin, interval)
+        mmap_mode = "r" if mmap else None
+        with self._lock:
+            version = self._manifest(coin, interval)[0]
+            # Another process may drop the version between reading the manifest
+            # and opening its files, the manifest then names a newer one
+            for _ in range(3):
+                timestamps_path, ohlcv_path = self._array_paths(partition, version)
+                try:
+                    timestamps = np.load(timestamps_path, mmap_mode=mmap_mode)
+                    ohlcv = np.load(ohlcv_path, mmap_mode=mmap_mode)
+                except FileNotFoundError:
+                    latest = self._manifest(coin, interval)[0]
+                    if latest == version:
+                        break
+                    version = latest
+                    continue
+                except (OSError, ValueError):
+                    break
+                if ohlcv.shape != (len(CANDLE_COLUMNS), len(timestamps)):
+                    break
+                return timestamps, ohlcv
+        return np.empty(0, dtype=np.int64), np.empty((5, 0), dtype=np.float64)
+
+    def missing_ranges(self, coin: str, interval: str, start: int, end: int) -> list:
+        """Return the sub-ranges of [start, end] that are not yet covered."""
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(coin, interval):
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start - 1))
+            cursor = max(cursor, covered_end + 1)
+            if cursor > end:
+                break
+        if cursor <= end:
+            missing.append((cursor, end))
+        return missing
+
+    def read(
+        self, coin: str, interval: str, start: int, end: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, ohlcv) for candles opening within [start, end]."""
+        timestamps, ohlcv = self.load(coin, interval)
+        lo = np.searchsorted(timestamps, start, side="left")
+        hi = np.searchsorted(timestamps, end, side="right")
+        return timestamps[lo:hi], ohlcv[:, lo:hi]
+
+    def merge(
+        self,
+        coin: str,
+        interval: str,
+        timestamps: np.ndarray,
+        ohlcv: np.ndarray,
+        start: int,
+        end: int,
+    ) -> None:
+        """Merge freshly downloaded candles and mark [start, end] as covered.
+
+        Newly downloaded candles win over stored ones with the same timestamp.
+        An empty range (end < start) stores the candles without extending
+        coverage, which is how still-open candles are kept out of it.
+        """
+        with self._lock:
+            old_version, stale_version, ranges = self._manifest(coin, interval)
+            old_timestamps, old_ohlcv = self.load(coin, interval, mmap=False)
+            all_timestamps = np.concatenate(
+                [np.asarray(timestamps, dtype=np.int64), old_timestamps]
+            )
+            all_ohlcv = np.concatenate(
+                [np.asarray(ohlcv, dtype=np.float64), old_ohlcv], axis=1
+            )
+            # np.unique keeps the first occurrence, i.e. the new candle
+            all_timestamps, first = np.unique(all_timestamps, return_index=True)
+            all_ohlcv = all_ohlcv[:, first]
+
+            if start <= end:
+                ranges = sorted(ranges + [(start, end)])
+            merged = []
+            for range_start, range_end in ranges:
+                if merged and range_start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], range_end)
+                else:
+                    merged.append([range_start, range_end])
+
+            partition = self._partition(coin, interval)
+            os.makedirs(partition, exist_ok=True)
+            # Unique across processes, so concurrent merges never share files
+            version = uuid.uuid4().hex
+            timestamps_path, ohlcv_path = self._array_paths(partition, version)
+            self._atomic_save(timestamps_path, all_timestamps)
+            self._atomic_save(ohlcv_path, all_ohlcv)
+            coverage_path = os.path.join(partition, "coverage.json")
+            coverage_tmp_path = f"{coverage_path}.{version}.tmp"
+            with open(coverage_tmp_path, "w") as f:
+                json.dump(
+                    {"version": version, "previous": old_version, "ranges": merged},
+                    f,
+                )
+            os.replace(coverage_tmp_path, coverage_path)
+
+            self._remove_stale_versions(
+                partition, version, old_version, stale_version
+            )
+
+    def _remove_stale_versions(self, partition, version, old_version, stale_version):
+        """Delete the array files of versions no reader can still resolve.
+
+        The version the previous merge superseded is deleted right away. Files
+        of any other version, left behind when merges from several processes
+        race, are deleted once they are older than ORPHAN_MAX_AGE_S so that
+        the files another process is still writing are never touched.
+        """
+        keep = set(self._array_paths(partition, version))
+        keep.update(self._array_paths(partition, old_version))
+        stale = set(self._array_paths(partition, stale_version)) - keep
+        now = time.time()
+        for name in os.listdir(partition):
+            path = os.path.join(partition, name)
+            if not name.endswith(".npy") or ".tmp" in name or path in keep:
+                continue
+            try:
+                if path in stale or now - os.path.getmtime(path) > ORPHAN_MAX_AGE_S:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _atomic_save(path: str, array: np.ndarray) -> None:
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+
+_STORE = None
+
+
+def get_candle_store():
+    """
+    Return the process-wide candle store, or None if caching is disabled.
+
+    Configured through the environment:
+        - CANDLE_STORE_ENABLED: set to "false" to always hit the API
+        - CANDLE_STORE_DIR: root directory of the store (default: .cache/candles)
+    """
+    global _STORE
+    if os.environ.get("CANDLE_STORE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _STORE is None:
+        _STORE = CandleStore(os.environ.get("CANDLE_STORE_DIR", ".cache/candles"))
+    return _STORE
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import random
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+load_dotenv(".env", override=True)
+
+# Shared HTTP client used by every fetcher in tools/api.py. Connections are
+# kept alive in one pool per host so repeated candle and open interest
+# requests skip the TCP+TLS handshake.
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 10))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 16))
+HTTP_MAX_CONCURRENCY_PER_HOST = int(os.environ.get("HTTP_MAX_CONCURRENCY_PER_HOST", 8))
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_sessions = {}
+_semaphores = {}
+_lock = threading.Lock()
+
+# Async clients are bound to the event loop they were created in
+_async_clients = {}
+
+
+def _create_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        # The HyperLiquid and Copin endpoints are read-only queries sent as POST
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_host_client(url: str) -> tuple[requests.Session, threading.BoundedSemaphore]:
+    host = urlsplit(url).netloc
+    with _lock:
+        if host not in _sessions:
+            _sessions[host] = _create_session()
+            _semaphores[host] = threading.BoundedSemaphore(
+                HTTP_MAX_CONCURRENCY_PER_HOST
+            )
+        return _sessions[host], _semaphores[host]
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the keep-alive session for the host of url, creating it on first use."""
+    session, _ = _get_host_client(url)
+    return session
+
+
+def http_request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the pooled session of its host.
+
+    Requests are retried with exponential backoff on 429 and 5xx responses
+    (honouring Retry-After), and at most HTTP_MAX_CONCURRENCY_PER_HOST
+    requests run against the same host at once.
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL
+        **kwargs: Passed to requests.Session.request; timeout defaults to HTTP_TIMEOUT
+
+    Returns:
+        requests.Response: The response of the last attempt
+    """
+    session, semaphore = _get_host_client(url)
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    with semaphore:
+        return session.request(method, url, **kwargs)
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """Send a GET request through the shared client, see http_request."""
+    return http_request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """Send a POST request through the shared client, see http_request."""
+    return http_request("POST", url, **kwargs)
+
+
+def close_sessions() -> None:
+    """Close every pooled session, e.g. before the process exits."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _semaphores.clear()
+
+
+def _get_async_host_client(url: str) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    host = urlsplit(url).netloc
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(host)
+    if entry is None or entry[0] is not loop or entry[1].is_closed:
+        client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+            ),
+        )
+        entry = (loop, client, asyncio.Semaphore(HTTP_MAX_CONCURRENCY_PER_HOST))
+        _async_clients[host] = entry
+    return entry[1], entry[2]
+
+
+async def ahttp_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Async version of http_request, backed by one httpx.AsyncClient per host.
+
+    Applies the same timeout, per-host concurrency limit and retry policy:
+    429/5xx responses and transport errors are retried with exponential
+    backoff, honouring Retry-After.
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL
+        **kwargs: Passed to httpx.AsyncClient.request
+
+    Returns:
+        httpx.Response: The response of the last attempt
+    """
+    client, semaphore = _get_async_host_client(url)
+    async with semaphore:
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            last_attempt = attempt == HTTP_MAX_RETRIES
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                retry_after = None
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = HTTP_BACKOFF_FACTOR * 2**attempt * (1 + random.random() / 2)
+            await asyncio.sleep(delay)
+
+
+async def ahttp_get(url: str, **kwargs) -> httpx.Response:
+    """Send an async GET request through the shared client, see ahttp_request."""
+    return await ahttp_request("GET", url, **kwargs)
+
+
+async def ahttp_post(url: str, **kwargs) -> httpx.Response:
+    """Send an async POST request through the shared client, see ahttp_request."""
+    return await ahttp_request("POST", url, **kwargs)
+
+
+async def aclose_sessions() -> None:
+    """Close the async clients created in the running event loop."""
+    loop = asyncio.get_running_loop()
+    for host, (client_loop, client, _) in list(_async_clients.items()):
+        if client_loop is loop:
+            await client.aclose()
+            del _async_clients[host]
@@ -0,0 +1,80 @@
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # msgspec or the standard library is used instead
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # the standard library is used instead
+    msgspec = None
+
+
+JSON_BACKENDS = ("auto", "orjson", "msgspec", "stdlib")
+
+
+def _select_backend(name: str) -> str:
+    """Resolve JSON_BACKEND to an installed backend."""
+    installed = {"orjson": orjson, "msgspec": msgspec, "stdlib": json}
+    if name not in JSON_BACKENDS:
+        supported = ", ".join(JSON_BACKENDS)
+        print(f"Unknown JSON_BACKEND {name!r}, expected one of {supported}")
+        name = "auto"
+    if name != "auto" and installed[name] is None:
+        print(f"JSON_BACKEND {name!r} is not installed, using the fastest available")
+        name = "auto"
+    if name == "auto":
+        return next(backend for backend, module in installed.items() if module)
+    return name
+
+
+JSON_BACKEND = _select_backend(os.environ.get("JSON_BACKEND", "auto").lower())
+
+
+def loads(data):
+    """
+    Decode a JSON document with the configured backend.
+
+    Args:
+        data (str or bytes): JSON document, e.g. the raw content of an HTTP
+            response, which skips decoding it to text first
+
+    Returns:
+        The decoded value
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON, whatever the backend
+    """
+    if JSON_BACKEND == "orjson":
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(data)
+    if JSON_BACKEND == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), "", 0) from e
+    return json.loads(data)
+
+
+def dumps(obj) -> str:
+    """
+    Encode a value as compact JSON with the configured backend.
+
+    Meant for machine-read payloads such as request bodies. Text that ends up
+    in LLM prompts keeps json.dumps, so prompts (and their cache keys) do not
+    depend on which backend is installed.
+
+    Args:
+        obj: JSON serializable value (NumPy scalars and arrays are accepted
+            by orjson)
+
+    Returns:
+        str: JSON document
+    """
+    if JSON_BACKEND == "orjson":
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    if JSON_BACKEND == "msgspec":
+        return msgspec.json.encode(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
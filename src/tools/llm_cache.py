@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from typing import Iterator, Optional
+
+
+class LLMCacheMiss(KeyError):
+    """Raised in replay mode when a prompt has no cached response."""
+
+
+class LLMCache:
+    """Content-addressed, on-disk cache of LLM responses backed by SQLite.
+
+    Entries are keyed on provider, model, temperature, output mode and the
+    rendered prompt, expire after ttl_seconds and the least recently used ones
+    are evicted once more than max_entries are stored.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation keeps the cache thread-safe.
+        # The inner "with conn" commits or rolls back, closing() closes it.
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    @staticmethod
+    def make_key(
+        provider: str, model: str, temperature: float, prompt: str, output_mode: str
+    ) -> str:
+        """Return the cache key of a rendered prompt sent to a given model.
+
+        The output mode is part of the key since the same prompt is answered
+        with free-form text in one mode and a structured decision in the other.
+        """
+        payload = json.dumps(
+            [provider, model, temperature, output_mode, prompt], ensure_ascii=False
+        ).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return content
+
+    def set(self, key: str, content: str) -> None:
+        """Store a response and evict expired or least recently used entries."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, content, now, now),
+            )
+            if self.ttl_seconds:
+                conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+            conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            )
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache_mode() -> str:
+    """
+    Return the LLM cache mode from the LLM_CACHE_MODE environment variable.
+
+    Modes:
+        - "readwrite" (default): reuse cached responses, call the LLM on misses
+        - "replay": only serve cached responses, raise LLMCacheMiss on misses
+        - "off": always call the LLM
+    """
+    return os.environ.get("LLM_CACHE_MODE", "readwrite").lower()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Return the process-wide LLM cache, or None if caching is off.
+
+    Configured through the environment:
+        - LLM_CACHE_PATH: SQLite file (default: .cache/llm_cache.sqlite)
+        - LLM_CACHE_TTL: Seconds before an entry expires, 0 to never expire (default: 30 days)
+        - LLM_CACHE_MAX_ENTRIES: Entries kept before LRU eviction (default: 100000)
+    """
+    if get_llm_cache_mode() == "off":
+        return None
+    path = os.environ.get("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = LLMCache(
+                path,
+                ttl_seconds=float(os.environ.get("LLM_CACHE_TTL", 30 * 24 * 3600)),
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 100000)),
+            )
+        return _caches[path]
+
+
+def lookup_llm_response(key: str) -> Optional[str]:
+    """
+    Look up a cached response according to the cache mode.
+
+    Returns:
+        str: Cached response
+        None: On a miss outside replay mode, or when caching is off
+
+    Raises:
+        LLMCacheMiss: On a miss in replay mode
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    content = cache.get(key)
+    if content is None and get_llm_cache_mode() == "replay":
+        raise LLMCacheMiss(f"No cached LLM response for prompt {key[:12]}")
+    return content
+
+
+def store_llm_response(key: str, content: str) -> None:
+    """Store a fresh LLM response unless caching is off."""
+    cache = get_llm_cache()
+    if cache is not None:
+        cache.set(key, content)
@@ -0,0 +1,186 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class PriceFrame:
+    """Immutable OHLCV container passed through the agent state.
+
+    Columns are stored as rows of one read-only 2D NumPy array, so selecting a
+    column returns a pandas Series that views the shared memory without
+    copying. Any attempt to write into it raises, which keeps agents running
+    as parallel graph branches from mutating each other's input; indicators
+    return their own outputs instead of adding columns.
+
+    Supports the read-only subset of the DataFrame API used by the agents:
+    frame["close"], len(frame), "close" in frame, frame.columns, frame.index
+    and frame.empty. Columns selected with frame["close"] are always float64,
+    so indicators run in float64 even when the prices are stored as float32.
+    """
+
+    __slots__ = ("_values", "_columns", "_index")
+
+    def __init__(self, values: np.ndarray, columns: list, index: pd.Index = None):
+        """
+        Args:
+            values: Array of shape (len(columns), n), one row per column
+            columns: Column names
+            index: Row index of length n (default: RangeIndex)
+        """
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape[0] != len(columns):
+            raise ValueError(
+                f"Expected an array of shape ({len(columns)}, n), got {values.shape}"
+            )
+        values = values.view()
+        values.flags.writeable = False
+        self._values = values
+        self._columns = {column: i for i, column in enumerate(columns)}
+        self._index = index if index is not None else pd.RangeIndex(values.shape[1])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, copy: bool = True) -> "PriceFrame":
+        """Build a PriceFrame from a DataFrame, copying its values once.
+
+        float32 frames stay float32, any other dtype is stored as float64.
+        With copy=False the values of a single-dtype frame, such as the ones
+        built by the price fetchers, are wrapped without copying; only pass it
+        for frames nothing else holds on to.
+        """
+        dtype = np.float32 if (df.dtypes == np.float32).all() else np.float64
+        values = np.ascontiguousarray(df.to_numpy(dtype=dtype, copy=copy).T)
+        return cls(values, list(df.columns), df.index)
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    @property
+    def index(self) -> pd.Index:
+        return self._index
+
+    @property
+    def empty(self) -> bool:
+        return self._values.shape[1] == 0
+
+    def __len__(self) -> int:
+        return self._values.shape[1]
+
+    def __contains__(self, column) -> bool:
+        return column in self._columns
+
+    def __getitem__(self, column: str) -> pd.Series:
+        # float64 columns are viewed, float32 ones are upcast into a copy
+        return pd.Series(
+            self.values(column),
+            index=self._index,
+            name=column,
+            dtype=np.float64,
+            copy=False,
+        )
+
+    def values(self, column: str) -> np.ndarray:
+        """Return the read-only array of a column, in its stored dtype."""
+        return self._values[self._columns[column]]
+
+    def slice_rows(self, start: int, stop: int) -> "PriceFrame":
+        """Return rows start:stop as a PriceFrame viewing the same memory."""
+        return PriceFrame(
+            self._values[:, start:stop], self.columns, self._index[start:stop]
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return a writable DataFrame copy."""
+        return pd.DataFrame(
+            {column: self.values(column).copy() for column in self._columns},
+            index=self._index,
+        )
+
+    def __repr__(self) -> str:
+        return f"PriceFrame(columns={self.columns}, rows={len(self)})"
+
+
+# Column dtype of the price frames built by the fetchers: float64 or float32
+PRICE_DTYPES = ("float64", "float32")
+
+
+def price_dtype() -> np.dtype:
+    """Return the configured price column dtype (PRICE_DTYPE, default float64)."""
+    dtype = os.environ.get("PRICE_DTYPE", "float64").lower()
+    if dtype not in PRICE_DTYPES:
+        raise ValueError(
+            f"Unsupported PRICE_DTYPE {dtype!r}, expected one of "
+            + ", ".join(PRICE_DTYPES)
+        )
+    return np.dtype(dtype)
+
+
+def to_time_index(timestamps) -> pd.DatetimeIndex:
+    """
+    Build the canonical price index from candle open times in milliseconds.
+
+    Returns:
+        pd.DatetimeIndex: UTC, nanosecond resolution index named "timestamp"
+    """
+    return pd.DatetimeIndex(
+        pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit="ms", utc=True)
+        .as_unit("ns"),
+        name="timestamp",
+    )
+
+
+def to_utc_timestamp(value) -> pd.Timestamp:
+    """
+    Convert a date to a UTC Timestamp.
+
+    Naive dates (e.g. 'YYYY-MM-DD' strings) are read in local time, like
+    tools.api.date_to_timestamp, so slices match the ranges the fetchers
+    download.
+    """
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = pd.Timestamp(timestamp.to_pydatetime().astimezone())
+    return timestamp.tz_convert("UTC")
+
+
+def time_bounds(index: pd.DatetimeIndex, start=None, end=None) -> tuple:
+    """
+    Locate the rows of a sorted time index within [start, end] by binary search.
+
+    Args:
+        index: Sorted, unique UTC DatetimeIndex
+        start: First time included, None for the beginning of the index
+        end: Last time included, None for the end of the index
+
+    Returns:
+        tuple: (lo, hi) row positions, the rows are index[lo:hi]
+    """
+    lo = 0
+    hi = len(index)
+    if start is not None:
+        lo = int(index.searchsorted(to_utc_timestamp(start), side="left"))
+    if end is not None:
+        hi = int(index.searchsorted(to_utc_timestamp(end), side="right"))
+    return lo, max(lo, hi)
+
+
+def slice_time(prices, start=None, end=None):
+    """
+    Return the rows of a price frame whose candle opens within [start, end].
+
+    Takes O(log n) to locate the window. PriceFrame windows are views of the
+    same memory, DataFrame windows are positional slices.
+
+    Args:
+        prices: DataFrame or PriceFrame indexed by a sorted UTC DatetimeIndex
+        start: First time included (str, datetime or Timestamp), None for no bound
+        end: Last time included, None for no bound
+
+    Returns:
+        Same type as prices
+    """
+    lo, hi = time_bounds(prices.index, start, end)
+    if isinstance(prices, PriceFrame):
+        return prices.slice_rows(lo, hi)
+    return prices.iloc[lo:hi]
@@ -0,0 +1,82 @@
+import numpy as np
+
+from tools.candle_store import CANDLE_COLUMNS, INTERVAL_MS
+
+
+DEFAULT_INTERVAL = "1h"
+
+_OPEN, _CLOSE, _HIGH, _LOW, _VOLUME = (
+    CANDLE_COLUMNS.index(column)
+    for column in ("open", "close", "high", "low", "volume")
+)
+
+
+def validate_interval(interval: str) -> str:
+    """Return interval if it is a supported candle interval, else raise ValueError."""
+    if interval not in INTERVAL_MS:
+        raise ValueError(
+            f"Unsupported interval {interval!r}, expected one of "
+            + ", ".join(INTERVAL_MS)
+        )
+    return interval
+
+
+def bars_per_day(interval: str) -> int:
+    """Number of candles of an interval in one day, at least 1."""
+    return max(1, INTERVAL_MS["1d"] // INTERVAL_MS[validate_interval(interval)])
+
+
+def source_intervals(interval: str) -> list:
+    """
+    Finer intervals a candle interval can be derived from, coarsest first.
+
+    An interval qualifies when its length evenly divides the target's, so
+    every target candle is made of whole source candles.
+    """
+    target_ms = INTERVAL_MS[validate_interval(interval)]
+    return sorted(
+        (
+            source
+            for source, source_ms in INTERVAL_MS.items()
+            if source_ms < target_ms and target_ms % source_ms == 0
+        ),
+        key=INTERVAL_MS.get,
+        reverse=True,
+    )
+
+
+def resample_candles(timestamps, ohlcv, interval: str):
+    """
+    Aggregate candles into a coarser interval.
+
+    Candles are grouped by the interval bucket their open time falls in
+    (buckets are aligned on the Unix epoch, i.e. 00:00 UTC for daily candles):
+    first open, last close, highest high, lowest low and summed volume. Buckets
+    without any source candle are left out, and the last bucket is partial if
+    its period has not ended yet.
+
+    Args:
+        timestamps: Sorted int64 candle open times in milliseconds
+        ohlcv: float64 array of shape (5, n) ordered as CANDLE_COLUMNS
+        interval (str): Target interval, e.g. "4h" or "1d"
+
+    Returns:
+        tuple: (timestamps, ohlcv) of the resampled candles
+    """
+    interval_ms = INTERVAL_MS[validate_interval(interval)]
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    if len(timestamps) == 0:
+        return timestamps.copy(), ohlcv.copy()
+
+    buckets = timestamps - timestamps % interval_ms
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(buckets)) - 1
+
+    resampled = np.empty((len(CANDLE_COLUMNS), len(starts)), dtype=np.float64)
+    resampled[_OPEN] = ohlcv[_OPEN, starts]
+    resampled[_CLOSE] = ohlcv[_CLOSE, ends]
+    resampled[_HIGH] = np.maximum.reduceat(ohlcv[_HIGH], starts)
+    resampled[_LOW] = np.minimum.reduceat(ohlcv[_LOW], starts)
+    resampled[_VOLUME] = np.add.reduceat(ohlcv[_VOLUME], starts)
+    return buckets[starts], resampled
@@ -0,0 +1,51 @@
+import math
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # counted with the character estimate below
+    tiktoken = None
+
+
+# Average characters per token of English text for OpenAI style tokenizers
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Return the tiktoken encoding of a model, or None if it cannot be loaded."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Unknown to tiktoken (Azure deployments, Groq, Gemini...)
+        pass
+    except Exception:
+        # Encoding files are downloaded on first use and may be unreachable
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """
+    Count the tokens of a prompt.
+
+    Uses the model's tiktoken encoding when available (cl100k_base for models
+    tiktoken does not know), otherwise estimates CHARS_PER_TOKEN characters
+    per token.
+
+    Args:
+        text (str): Rendered prompt
+        model (str): Model name used to pick the encoding
+
+    Returns:
+        int: Number of tokens
+    """
+    encoding = _get_encoding(model or "gpt-4")
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))